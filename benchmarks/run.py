@@ -0,0 +1,237 @@
+# 📁 benchmarks/run.py
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+# Allow `python benchmarks/run.py` from the repo root as well as `python -m benchmarks.run`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import generate, FILES
+from src.sites import load_sites, site_resources
+from src.forecasting import RESOURCES, forecast_all
+from src.preprocessing import load_and_preprocess_multivariate
+from src.dataset_cache import clear_cache, load_engineered, load_table
+from src.model_registry import clear_registry
+from src.windowing import sliding_windows, window_batches
+from src.ingestion import append_rows
+from src.streaming import stream_preprocessed
+from src import instrumentation
+
+# Times and memory-profiles each pipeline stage on synthetic data of several sizes and
+# writes one JSON file per run to benchmarks/results/, so runs can be diffed:
+#
+#   python -m benchmarks.run --sizes 1300,13000,130000
+#   python -m benchmarks.run --sizes 13000 --compare benchmarks/results/<previous>.json
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+REGRESSION_THRESHOLD = 1.25
+
+
+def measure(func, repeats=3, setup=None):
+    # Best/mean wall time over `repeats` runs, plus the Python heap peak of one extra run
+    times = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    if not was_tracing:
+        tracemalloc.stop()
+
+    return {'seconds_min': min(times), 'seconds_mean': sum(times) / len(times), 'peak_bytes': peak - base}
+
+
+def _cold():
+    clear_cache()
+    clear_registry()
+
+
+def site_stages(site, n_rows, repeats):
+    resources = site_resources(site, RESOURCES)
+    results = []
+
+    def record(stage, func, setup=None):
+        try:
+            stats = measure(func, repeats, setup)
+            results.append({'stage': stage, 'rows': n_rows, **stats})
+            print(f"  {stage:<28} {stats['seconds_min'] * 1000:10.2f} ms   peak {stats['peak_bytes'] / 1e6:8.2f} MB")
+        except Exception as e:
+            print(f"  {stage:<28} failed: {e}")
+            results.append({'stage': stage, 'rows': n_rows, 'error': str(e)})
+
+    def preprocess_all():
+        for cfg in resources.values():
+            load_and_preprocess_multivariate(cfg['path'], cfg['features'])
+
+    def preprocess_inference():
+        # Transform-only against the saved scaler, last window only (what forecast() does)
+        for cfg in resources.values():
+            load_and_preprocess_multivariate(cfg['path'], cfg['features'], cfg['scaler'], last_n=30)
+
+    record('preprocess.cold', preprocess_all, setup=_cold)
+    record('preprocess.warm', preprocess_all)
+    record('preprocess.inference', preprocess_inference)
+
+    cfg = resources['icu']
+    data, _, features = load_and_preprocess_multivariate(cfg['path'], cfg['features'])
+    target_index = features.index(cfg['target'])
+
+    def windows_legacy():
+        # The list-of-slices construction training/evaluation used before src.windowing
+        X, y = [], []
+        for i in range(30, len(data)):
+            X.append(data[i - 30:i])
+            y.append(data[i, target_index])
+        return len(X)
+
+    def windows_batched():
+        return sum(len(X) for X, _ in window_batches(data, 30, 1, target_index, batch_size=1024))
+
+    def preprocess_streaming():
+        # Chunked two-pass path (src.streaming), the alternative to holding the history in memory
+        blocks, _, _, _ = stream_preprocessed(cfg['path'], cfg['features'], chunk_rows=10_000)
+        return sum(len(block) for block in blocks)
+
+    record('preprocess.streaming', preprocess_streaming)
+    record('windowing.legacy_lists', windows_legacy)
+    record('windowing.strided_views', lambda: sliding_windows(data, 30, 1, target_index))
+    record('windowing.batched', windows_batched)
+
+    record('forecast_all.cold', lambda: forecast_all(7, site), setup=_cold)
+    record('forecast_all.warm', lambda: forecast_all(7, site))
+    record('forecast_all.baseline', lambda: forecast_all(7, site, method='ets'))
+
+    # Ingest path on a scratch copy so the generated site stays unchanged
+    scratch = tempfile.mkdtemp(prefix='hrf-bench-')
+    try:
+        bed_path = os.path.join(scratch, FILES['beds'])
+        shutil.copy(cfg['path'], bed_path)
+        table = load_table(bed_path)
+        daily = bool((table['date'] == table['date'].dt.normalize()).all())
+        row = table.iloc[-1].to_dict()
+        row['date'] = row['date'].strftime('%Y-%m-%d' if daily else '%Y-%m-%d %H:%M:%S')
+        # Leave the ER rolling means to ingestion, which derives them from the file tail
+        row.pop('er_visits_rolling_mean_3', None)
+        row.pop('er_visits_rolling_mean_7', None)
+        load_engineered(bed_path, cfg['features'])
+
+        def ingest_and_refresh():
+            append_rows(bed_path, [row])
+            load_engineered(bed_path, cfg['features'])
+
+        record('ingest.append_row', lambda: append_rows(bed_path, [row]))
+        record('ingest.append_and_refresh', ingest_and_refresh)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def run(sizes, n_sites=1, repeats=3, model_dir='model', workdir=None, seed=0):
+    # Synthetic data goes to a temp dir that is removed afterwards, unless workdir is given
+    if workdir is None:
+        workdir = tempfile.mkdtemp(prefix='hrf-bench-data-')
+        try:
+            return run(sizes, n_sites, repeats, model_dir, workdir, seed)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sizes': sizes,
+            'sites': n_sites,
+            'repeats': repeats,
+        },
+        'results': [],
+    }
+    for n_rows in sizes:
+        print(f"\n📏 {n_rows} rows x {n_sites} site(s)")
+        sites_file = generate(os.path.join(workdir, f"rows{n_rows}"), n_rows, n_sites, model_dir, seed)
+        sites = load_sites(sites_file)
+        report['results'].extend(site_stages(sites[0], n_rows, repeats))
+
+        if n_sites > 1:
+            from src.scheduler import forecast_sites
+            stats = measure(lambda: forecast_sites(sites, 7), repeats=1)
+            report['results'].append({'stage': 'forecast_sites', 'rows': n_rows, 'sites': n_sites, **stats})
+            print(f"  {'forecast_sites':<28} {stats['seconds_min'] * 1000:10.2f} ms")
+
+    report['instrumentation'] = instrumentation.snapshot()
+    return report
+
+
+def save(report, path=None):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = path or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['meta']['commit'] or 'local'}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare(report, baseline_path, threshold=REGRESSION_THRESHOLD):
+    # Returns the (stage, rows) pairs that got slower than threshold x the baseline
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['stage'], r['rows']): r for r in baseline['results'] if 'seconds_min' in r}
+
+    regressions = []
+    print(f"\n🔍 Compared with {baseline_path} (commit {baseline['meta'].get('commit')})")
+    for r in report['results']:
+        old = previous.get((r['stage'], r['rows']))
+        if not old or 'seconds_min' not in r or old['seconds_min'] <= 0:
+            continue
+        ratio = r['seconds_min'] / old['seconds_min']
+        flag = '❌' if ratio > threshold else '✅'
+        print(f"  {flag} {r['stage']:<28} {r['rows']:>9} rows  {ratio:6.2f}x")
+        if ratio > threshold:
+            regressions.append((r['stage'], r['rows'], ratio))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the forecasting pipeline on synthetic data")
+    parser.add_argument('--sizes', default='1300,13000,130000', help="comma-separated row counts")
+    parser.add_argument('--sites', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--model-dir', default='model')
+    parser.add_argument('--workdir', default=None, help="where to write synthetic data and keep it (default: a temp dir, removed afterwards)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None, help="previous results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    report = run([int(s) for s in args.sizes.split(',')], args.sites, args.repeats,
+                 args.model_dir, args.workdir, args.seed)
+    print(f"\n💾 {save(report, args.output)}")
+    if args.compare:
+        sys.exit(1 if compare(report, args.compare, args.threshold) else 0)
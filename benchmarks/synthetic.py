@@ -0,0 +1,131 @@
+# 📁 benchmarks/synthetic.py
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+# Schema-compatible synthetic versions of the three data/*_enhanced.csv tables, at any
+# size and for any number of sites. Column order matches the real files exactly.
+BED_COLUMNS = ['date', 'icu_beds', 'general_beds', 'icu_available', 'general_available', 'er_visits',
+               'day_of_week', 'month', 'is_weekend', 'holiday_flag',
+               'er_visits_rolling_mean_3', 'er_visits_rolling_mean_7']
+STAFF_COLUMNS = ['date', 'available_doctors', 'available_nurses', 'total_doctors', 'total_nurses',
+                 'day_of_week', 'month', 'is_weekend', 'holiday_flag', 'staff_absenteeism_rate',
+                 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C']
+VENT_COLUMNS = ['date', 'total_ventilators', 'available_ventilators', 'day_of_week', 'month', 'is_weekend', 'holiday_flag']
+
+# Daily rows up to this many, hourly beyond (pandas timestamps end in 2262)
+MAX_DAILY_ROWS = 36500
+
+FILES = {
+    'beds': 'hospital_bed_data_enhanced.csv',
+    'staff': 'staff_allocation_enhanced.csv',
+    'vents': 'ventilators_enhanced.csv',
+}
+
+
+def _calendar(n_rows, start, freq):
+    dates = pd.date_range(start=start, periods=n_rows, freq=freq)
+    day_of_week = dates.dayofweek.to_numpy()
+    return dates, day_of_week, dates.month.to_numpy(), (day_of_week >= 5).astype(int)
+
+
+def _available(rng, total, load, noise):
+    # Availability = capacity minus a seasonal occupancy signal, clipped to [0, total]
+    occupied = np.round(total * load + rng.normal(0, noise, len(load)))
+    return np.clip(total - occupied, 0, total).astype(int)
+
+
+def generate_tables(n_rows, seed=0, start='2022-01-01', freq=None):
+    rng = np.random.default_rng(seed)
+    freq = freq or ('D' if n_rows <= MAX_DAILY_ROWS else 'h')
+    dates, day_of_week, month, is_weekend = _calendar(n_rows, start, freq)
+    date_strings = dates.strftime('%Y-%m-%d' if freq == 'D' else '%Y-%m-%d %H:%M:%S')
+    holiday_flag = (rng.random(n_rows) < 0.03).astype(int)
+    t = np.arange(n_rows)
+    # Shared demand signal: yearly + weekly seasonality, so resources co-move like the real data
+    demand = 0.65 + 0.12 * np.sin(2 * np.pi * t / 365.25) + 0.05 * np.sin(2 * np.pi * t / 7)
+
+    er_visits = rng.poisson(30 * (demand / 0.65))
+    er = pd.Series(er_visits)
+    icu_beds = np.full(n_rows, int(rng.integers(20, 40)))
+    general_beds = np.full(n_rows, int(rng.integers(60, 120)))
+    beds = pd.DataFrame({
+        'date': date_strings,
+        'icu_beds': icu_beds,
+        'general_beds': general_beds,
+        'icu_available': _available(rng, icu_beds, demand, 2.0),
+        'general_available': _available(rng, general_beds, demand * 0.9, 4.0),
+        'er_visits': er_visits,
+        'day_of_week': day_of_week,
+        'month': month,
+        'is_weekend': is_weekend,
+        'holiday_flag': holiday_flag,
+        'er_visits_rolling_mean_3': er.rolling(3, min_periods=1).mean(),
+        'er_visits_rolling_mean_7': er.rolling(7, min_periods=1).mean(),
+    }, columns=BED_COLUMNS)
+
+    total_doctors = np.full(n_rows, int(rng.integers(15, 30)))
+    total_nurses = np.full(n_rows, int(rng.integers(30, 60)))
+    absenteeism = np.clip(rng.normal(0.03, 0.015, n_rows) + 0.02 * holiday_flag, 0, 1)
+    shift = rng.integers(0, 3, n_rows)
+    staff = pd.DataFrame({
+        'date': date_strings,
+        'available_doctors': np.round(total_doctors * (1 - absenteeism) - rng.integers(0, 4, n_rows)).clip(0).astype(int),
+        'available_nurses': np.round(total_nurses * (1 - absenteeism) - rng.integers(0, 8, n_rows)).clip(0).astype(int),
+        'total_doctors': total_doctors,
+        'total_nurses': total_nurses,
+        'day_of_week': day_of_week,
+        'month': month,
+        'is_weekend': is_weekend,
+        'holiday_flag': holiday_flag,
+        'staff_absenteeism_rate': absenteeism,
+        'staff_shift_type_A': (shift == 0).astype(int),
+        'staff_shift_type_B': (shift == 1).astype(int),
+        'staff_shift_type_C': (shift == 2).astype(int),
+    }, columns=STAFF_COLUMNS)
+
+    total_ventilators = np.full(n_rows, int(rng.integers(15, 30)))
+    vents = pd.DataFrame({
+        'date': date_strings,
+        'total_ventilators': total_ventilators,
+        'available_ventilators': _available(rng, total_ventilators, demand * 0.5, 2.0),
+        'day_of_week': day_of_week,
+        'month': month,
+        'is_weekend': is_weekend,
+        'holiday_flag': holiday_flag,
+    }, columns=VENT_COLUMNS)
+
+    return {'beds': beds, 'staff': staff, 'vents': vents}
+
+
+def write_site(data_dir, n_rows, seed=0):
+    os.makedirs(data_dir, exist_ok=True)
+    for key, df in generate_tables(n_rows, seed).items():
+        df.to_csv(os.path.join(data_dir, FILES[key]), index=False)
+    return data_dir
+
+
+def generate(out_dir, n_rows, n_sites=1, model_dir='model', seed=0):
+    # Writes <out_dir>/<site>/data/*.csv plus a sites.json pointing every site at
+    # model_dir (the real models accept any history length with the same features)
+    sites = []
+    for i in range(n_sites):
+        name = f"site{i:03d}"
+        write_site(os.path.join(out_dir, name, 'data'), n_rows, seed + i)
+        sites.append({'name': name, 'data_dir': os.path.join(name, 'data'), 'model_dir': os.path.abspath(model_dir)})
+    with open(os.path.join(out_dir, 'sites.json'), 'w') as f:
+        json.dump(sites, f, indent=2)
+    return os.path.join(out_dir, 'sites.json')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic hospital resource data")
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows', type=int, default=13000)
+    parser.add_argument('--sites', type=int, default=1)
+    parser.add_argument('--model-dir', default='model')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.rows, args.sites, args.model_dir, args.seed))
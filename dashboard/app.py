@@ -7,11 +7,27 @@ import os
 # 🔧 Fix Python path so 'src/' can be imported when running from 'dashboard/'
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.data_summary import load_resource_status, load_er_trends
+from src.data_summary import load_resource_status, load_er_rollups
 from src.forecasting import forecast_all
+from src.model_registry import registry_stats
+from src.dataset_cache import cache_stats
+from src.ingestion import get_writer
+from src import forecast_store
+from src.uncertainty import forecast_intervals_all, shortage_alerts
+from src.instrumentation import span, snapshot, record_error
 
 st.set_page_config(page_title="Hospital Resource Dashboard", layout="wide")
 
+
+def run_caption(run_id, inputs):
+    # Age of a stored run, and whether data or models changed since it was computed
+    run = forecast_store.run_info(run_id)
+    age = pd.Timestamp.now() - pd.Timestamp(run['run_ts'])
+    text = f"🕒 Computed {run['run_ts']:%Y-%m-%d %H:%M} ({age.total_seconds() / 60:.0f} min ago)"
+    if run['inputs_version'] != inputs:
+        text += " — data or models changed since; `python -m src.precompute` will refresh it"
+    return text
+
 st.title("🏥 Hospital Resource Utilization Dashboard")
 
 # Tabs: Dashboard | Data Entry
@@ -42,16 +58,29 @@ if tab == "📊 Dashboard":
 
     # 🚨 Emergency Room Trends
     st.markdown("### 🚨 Emergency Room Visits")
-    daily, monthly = load_er_trends()
+    er = load_er_rollups()
     st.subheader("🗕 Daily ER Visits")
-    st.line_chart(daily)
+    st.line_chart(er['daily'])
+    st.subheader("📆 Weekly ER Visits")
+    st.line_chart(er['weekly'])
     st.subheader("🗓 Monthly ER Visits")
-    st.line_chart(monthly)
+    st.line_chart(er['monthly'])
 
     # 📈 Forecasted Trends
-    st.markdown("### 📈 Forecasted Trends (Next 7 Days)")
+    n_days = st.selectbox("Forecast Horizon (days)", [7, 14, 30])
+    st.markdown(f"### 📈 Forecasted Trends (Next {n_days} Days)")
     try:
-        forecast_df = forecast_all()
+        # Served from the forecast store (kept fresh by `python -m src.precompute`), even
+        # if the data or models changed since; computed here only if the store is empty
+        with span('render.forecast'):
+            inputs = forecast_store.inputs_version()
+            run_id = forecast_store.latest_run('default', n_days)
+            if run_id is None:
+                forecast_df = forecast_all(n_days)
+                run_id = forecast_store.write_forecast(forecast_df, 'default', inputs)
+            else:
+                forecast_df = forecast_store.load_run(run_id, n_days)
+        st.caption(run_caption(run_id, inputs))
         st.subheader("🛌 Bed Forecast")
         st.line_chart(forecast_df[['icu_forecast', 'general_forecast']])
         st.subheader("👩‍⚕️ Staff Forecast")
@@ -61,8 +90,45 @@ if tab == "📊 Dashboard":
         csv = forecast_df.to_csv(index=True).encode('utf-8')
         st.download_button("📂 Download Forecast Report", csv, "hospital_forecast_report.csv", "text/csv")
     except Exception as e:
+        record_error('dashboard_forecast', e)
         st.error(f"❌ Forecasting failed: {e}")
 
+    # ⚠️ Shortage Risk: sampled intervals and P(below threshold) per resource and day
+    st.markdown(f"### ⚠️ Shortage Risk (Next {n_days} Days)")
+    try:
+        # Read from the forecast store like the point forecast, stale or not; sampled
+        # here only if no stored run has intervals for this horizon yet
+        with span('render.uncertainty'):
+            inputs = forecast_store.inputs_version()
+            interval_run = forecast_store.latest_run('default', n_days, with_intervals=True)
+            if interval_run is None:
+                interval_run = forecast_store.latest_run('default', n_days)
+                if interval_run is None:
+                    raise ValueError("no stored forecast to sample intervals for")
+                # Sampled over the run's own horizon, which may exceed this view's
+                run_days = forecast_store.run_info(interval_run)['n_days']
+                forecast_store.write_intervals(forecast_intervals_all(run_days), interval_run)
+            intervals = forecast_store.load_intervals(interval_run, n_days)
+            alerts = shortage_alerts(n_days, intervals=intervals)
+        st.caption(run_caption(interval_run, inputs))
+        if alerts.empty:
+            st.success("✅ No resource is likely to fall below its shortage threshold")
+        else:
+            for _, alert in alerts.iterrows():
+                st.warning(f"🚨 {alert['resource']} on {alert['date']:%Y-%m-%d}: "
+                           f"{alert['p_shortage']:.0%} chance of falling below {alert['threshold']:.0f} "
+                           f"(expected {alert['mean']:.0f}, 90% interval {alert['q05']:.0f}–{alert['q95']:.0f})")
+        resource = st.selectbox("Resource", list(intervals.index.get_level_values('resource').unique()))
+        st.line_chart(intervals.loc[resource, ['q05', 'q50', 'q95', 'threshold']])
+    except Exception as e:
+        record_error('dashboard_uncertainty', e)
+        st.error(f"❌ Shortage risk unavailable: {e}")
+
+    with st.sidebar.expander("⚙️ Caches"):
+        st.json({**registry_stats(), **cache_stats()})
+    with st.sidebar.expander("⏱️ Timings"):
+        st.json(snapshot())
+
 # ===============================
 # ➕ DATA ENTRY TAB
 # ===============================
@@ -101,7 +167,7 @@ elif tab == "➕ Data Entry":
                 is_weekend = int(day_of_week >= 5)
                 holiday_flag = 0  # You can customize holiday logic later
 
-                # Bed Data ➡ enhanced CSV
+                # Bed Data (ER rolling means are filled in from the file tail)
                 bed_row = {
                     "date": date,
                     "icu_beds": icu_beds,
@@ -114,11 +180,8 @@ elif tab == "➕ Data Entry":
                     "is_weekend": is_weekend,
                     "holiday_flag": holiday_flag
                 }
-                bed_df = pd.read_csv("data/hospital_bed_data_enhanced.csv")
-                bed_df = pd.concat([bed_df, pd.DataFrame([bed_row])], ignore_index=True)
-                bed_df.to_csv("data/hospital_bed_data_enhanced.csv", index=False)
 
-                # Staff Data ➡ enhanced CSV
+                # Staff Data
                 staff_row = {
                     "date": date,
                     "available_doctors": available_doctors,
@@ -134,11 +197,8 @@ elif tab == "➕ Data Entry":
                     "is_weekend": is_weekend,
                     "holiday_flag": holiday_flag
                 }
-                staff_df = pd.read_csv("data/staff_allocation_enhanced.csv")
-                staff_df = pd.concat([staff_df, pd.DataFrame([staff_row])], ignore_index=True)
-                staff_df.to_csv("data/staff_allocation_enhanced.csv", index=False)
 
-                # Ventilator Data ➡ enhanced CSV
+                # Ventilator Data
                 vent_row = {
                     "date": date,
                     "total_ventilators": total_ventilators,
@@ -148,9 +208,14 @@ elif tab == "➕ Data Entry":
                     "is_weekend": is_weekend,
                     "holiday_flag": holiday_flag
                 }
-                vent_df = pd.read_csv("data/ventilators_enhanced.csv")
-                vent_df = pd.concat([vent_df, pd.DataFrame([vent_row])], ignore_index=True)
-                vent_df.to_csv("data/ventilators_enhanced.csv", index=False)
+
+                # ➡ enhanced CSVs, all three in one atomic commit through the shared writer
+                # thread, batched with whatever else is being submitted right now
+                get_writer().write({
+                    "data/hospital_bed_data_enhanced.csv": [bed_row],
+                    "data/staff_allocation_enhanced.csv": [staff_row],
+                    "data/ventilators_enhanced.csv": [vent_row],
+                }, timeout=30)
 
                 st.success("✅ New data added successfully!")
             except Exception as e:
@@ -1,65 +1,64 @@
 # 📁 evaluate_model.py
 
 import os
+import sys
 import numpy as np
 import pandas as pd
 import joblib
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from tensorflow.keras.models import load_model
 from src.preprocessing import load_and_preprocess_multivariate
+from src.forecasting import RESOURCES
+from src import backtest
+from src.sites import get_site, DEFAULT_SITE
+from src.windowing import sliding_windows, predict_in_batches
 
-# Evaluation targets
+# Evaluation targets, keyed by model name (same definitions forecasting uses)
 MODELS = {
-    'icu_model': {
-        'path': 'data/hospital_bed_data_enhanced.csv',
-        'target': 'icu_available',
-        'features': ['icu_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'],
-    },
-    'general_model': {
-        'path': 'data/hospital_bed_data_enhanced.csv',
-        'target': 'general_available',
-        'features': ['general_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'],
-    },
-    'doctor_model': {
-        'path': 'data/staff_allocation_enhanced.csv',
-        'target': 'available_doctors',
-        'features': ['available_doctors', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'],
-    },
-    'nurse_model': {
-        'path': 'data/staff_allocation_enhanced.csv',
-        'target': 'available_nurses',
-        'features': ['available_nurses', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'],
-    },
-    'ventilator_model': {
-        'path': 'data/ventilators_enhanced.csv',
-        'target': 'available_ventilators',
-        'features': ['available_ventilators', 'day_of_week', 'month', 'holiday_flag'],
+    os.path.splitext(os.path.basename(cfg['model']))[0]: {
+        'path': cfg['path'],
+        'target': cfg['target'],
+        'features': cfg['features'],
     }
+    for cfg in RESOURCES.values()
 }
 
-for model_name, config in MODELS.items():
-    print(f"\n📊 Evaluating model: model/{model_name}.keras")
+def evaluate(site=None):
+    site = site or DEFAULT_SITE
+    for model_name, config in MODELS.items():
+        model_path = os.path.join(site['model_dir'], f"{model_name}.keras")
+        scaler_path = os.path.join(site['model_dir'], f"{model_name}_scaler.save")
+        data_path = os.path.join(site['data_dir'], os.path.basename(config['path']))
+        print(f"\n📊 Evaluating model: {model_path}")
 
-    # ✅ FIXED: Only unpack 3 values
-    data, scaler, full_feature_columns = load_and_preprocess_multivariate(config['path'], config['features'])
+        # ✅ FIXED: Only unpack 3 values
+        data, scaler, full_feature_columns = load_and_preprocess_multivariate(data_path, config['features'], scaler_path)
 
-    # Prepare sequences
-    X, y = [], []
-    target_idx = full_feature_columns.index(config['target'])
-    for i in range(30, len(data)):
-        X.append(data[i-30:i])
-        y.append(data[i, target_idx])
-    X, y = np.array(X), np.array(y)
+        # Prepare sequences (strided views, no per-window copies)
+        target_idx = full_feature_columns.index(config['target'])
+        _, y = sliding_windows(data, 30, 1, target_idx)
+        y = y[:, 0]
 
-    # Load trained model
-    model = load_model(f"model/{model_name}.keras")
+        # Load trained model
+        model = load_model(model_path)
 
-    # Predict
-    y_pred = model.predict(X).flatten()
+        # Predict, one batch of windows at a time
+        y_pred = predict_in_batches(model, data, 30).flatten()
 
-    # Evaluate (scaled values)
-    r2 = r2_score(y, y_pred)
-    mae = mean_absolute_error(y, y_pred)
-    rmse = np.sqrt(mean_squared_error(y, y_pred))
+        # Evaluate (scaled values)
+        r2 = r2_score(y, y_pred)
+        mae = mean_absolute_error(y, y_pred)
+        rmse = np.sqrt(mean_squared_error(y, y_pred))
 
-    print(f"✅ {config['target']} — R²: {r2:.2f}, MAE: {mae:.2f}, RMSE: {rmse:.2f}")
+        print(f"✅ {config['target']} — R²: {r2:.2f}, MAE: {mae:.2f}, RMSE: {rmse:.2f}")
+
+
+# python evaluate_model.py [site_name]
+# python evaluate_model.py [site_name] --backtest [--horizons 1,7,14 --origins 100 ...]
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    site = get_site(args.pop(0)) if args and not args[0].startswith('-') else None
+    if args and args[0] == '--backtest':
+        backtest.main(args[1:], site)
+    else:
+        evaluate(site)
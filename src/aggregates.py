@@ -0,0 +1,196 @@
+# 📁 src/aggregates.py
+import os
+import csv
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+from src.cache import file_signature, read_appended, tail_line
+from src.instrumentation import span, incr
+
+# Rollups and a "latest status" snapshot per table, maintained incrementally: rows
+# appended since the last update are parsed on their own and folded into the running
+# daily / weekly / monthly sums, last row and running maxima. The state is persisted
+# next to the ingestion tail state (data/.state/<stem>.agg.json), so a fresh process
+# picks it up without rereading the history.
+#
+# Plain Python on purpose: src.ingestion refreshes it after every commit.
+STATE_DIR_NAME = '.state'
+
+# What each table keeps: columns summed per day/week/month and columns with a running max
+AGGREGATES = {
+    'hospital_bed_data_enhanced.csv': {'sum': ['er_visits'], 'max': []},
+    'staff_allocation_enhanced.csv': {'sum': [], 'max': ['total_doctors', 'total_nurses']},
+    'ventilators_enhanced.csv': {'sum': [], 'max': []},
+}
+
+# Zero or missing values after `after` are imputed with a value drawn from [low, high),
+# seeded by the date itself: the same date always gets the same value, whatever order
+# rows arrive in, so incremental and full rebuilds agree and results can be cached.
+IMPUTE = {
+    'er_visits': {'after': datetime(2025, 1, 8), 'low': 80, 'high': 250},
+}
+IMPUTE_SEED = int(os.environ.get('HRF_IMPUTE_SEED', 0))
+
+_states = {}
+_lock = threading.Lock()
+
+
+def _agg_path(file_path):
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, STATE_DIR_NAME, f"{os.path.splitext(name)[0]}.agg.json")
+
+
+def _parse_date(value):
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def impute(column, when, value):
+    rule = IMPUTE.get(column)
+    if rule is None or when <= rule['after'] or (value is not None and value > 0):
+        return value
+    rng = random.Random(IMPUTE_SEED * 1_000_003 + when.toordinal())
+    return float(rng.randrange(rule['low'], rule['high']))
+
+
+def _empty_state(file_path, header):
+    spec = AGGREGATES.get(os.path.basename(file_path), {'sum': [], 'max': []})
+    return {
+        'header': header,
+        'size': 0,
+        'mtime_ns': 0,
+        'last_line': '',
+        'rows': 0,
+        'latest': None,
+        'max': {col: None for col in spec['max'] if col in header},
+        'daily': {col: {} for col in spec['sum'] if col in header},
+        'weekly': {col: {} for col in spec['sum'] if col in header},
+        'monthly': {col: {} for col in spec['sum'] if col in header},
+    }
+
+
+def _fold(state, values):
+    # Add one CSV row (a list of strings in header order) to the state
+    row = dict(zip(state['header'], values))
+    when = _parse_date(row.get('date'))
+    if when is None:
+        return  # rows without a valid date are skipped, as the pandas path drops them
+    state['rows'] += 1
+    state['latest'] = row
+
+    for col in state['max']:
+        value = _number(row.get(col))
+        if value is not None and (state['max'][col] is None or value > state['max'][col]):
+            state['max'][col] = value
+
+    day = when.date()
+    keys = {
+        'daily': day.isoformat(),
+        'weekly': (day - timedelta(days=day.weekday())).isoformat(),  # week starting Monday
+        'monthly': day.replace(day=1).isoformat(),
+    }
+    for col in state['daily']:
+        value = impute(col, when, _number(row.get(col))) or 0.0
+        for period, key in keys.items():
+            sums = state[period][col]
+            sums[key] = sums.get(key, 0.0) + value
+
+
+def _rebuild(file_path):
+    with span('aggregates.rebuild'), open(file_path, newline='') as f:
+        reader = csv.reader(f)
+        state = _empty_state(file_path, next(reader))
+        for values in reader:
+            if values:
+                _fold(state, values)
+    return state
+
+
+def _extend(state, file_path, size):
+    # Fold in only the bytes written after state['size'], provided the file up to there
+    # is unchanged; None means the file was rewritten and needs a rebuild
+    appended = read_appended(file_path, state['size'], state['last_line'].encode('utf-8'), size)
+    if appended is None:
+        return None
+    with span('aggregates.extend'):
+        for values in csv.reader(appended.decode('utf-8').splitlines()):
+            if values:
+                _fold(state, values)
+    incr('aggregates.extended_rows', appended.count(b'\n'))
+    return state
+
+
+def _save(file_path, state):
+    path = _agg_path(file_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _load_saved(file_path):
+    path = _agg_path(file_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _current(file_path):
+    # Caller holds _lock. Up to date state for file_path: kept in memory while the file
+    # is unchanged, extended by the appended rows when it only grew, rebuilt otherwise
+    key = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    state = _states.get(key) or _load_saved(file_path)
+    if state is None or (state['size'], state['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        if state is not None and state.get('seed') == IMPUTE_SEED and stat.st_size > state['size']:
+            state = _extend(state, file_path, stat.st_size)
+        else:
+            state = None
+        if state is None:
+            state = _rebuild(file_path)
+        state.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, seed=IMPUTE_SEED,
+                     last_line=tail_line(file_path, stat.st_size).decode('utf-8'))
+        _save(file_path, state)
+    _states[key] = state
+    return state
+
+
+def rollups(file_path, column):
+    # {'daily' | 'weekly' | 'monthly': {ISO period start: sum}} for one summed column
+    with _lock:
+        state = _current(file_path)
+        return {period: dict(state[period][column]) for period in ('daily', 'weekly', 'monthly')}
+
+
+def latest(file_path):
+    # Last dated row (values as written) and the running maxima of the table
+    with _lock:
+        state = _current(file_path)
+        return dict(state['latest'] or {}), dict(state['max'])
+
+
+def version(*file_paths):
+    # Changes whenever any of the tables change; a cheap cache key for derived results
+    return tuple(file_signature(p) for p in file_paths)
+
+
+def refresh(file_paths):
+    # Called after ingestion commits, so the next render finds the snapshot already updated
+    with _lock:
+        for path in file_paths:
+            _current(path)
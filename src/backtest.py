@@ -0,0 +1,134 @@
+# 📁 src/backtest.py
+import os
+import argparse
+from concurrent.futures import as_completed
+import numpy as np
+import pandas as pd
+from src.preprocessing import load_and_preprocess_multivariate
+from src.dataset_cache import load_engineered
+from src.forecasting import RESOURCES, predict_windows, inverse_target
+from src.sites import site_resources
+from src.windowing import sliding_windows
+from src.scheduler import make_pool
+
+# Rolling-origin backtest: for each origin t the model sees the 30 rows before t and
+# forecasts t, t+1, ... exactly as forecast() would (same autoregressive or direct path).
+# All origins of a resource go through one batched predict per horizon step, and the
+# errors are measured in original units via the scaler.
+#
+# Note: the models and scaler were fit on the full history, so origins inside the
+# training range are optimistic; pass cutoffs after the last training date for a
+# strictly out-of-sample score.
+LOOKBACK = 30
+
+
+def horizon_metrics(actual, predicted):
+    # (n_origins, n_horizons) arrays -> MAE / RMSE / R² per horizon column, vectorized
+    err = predicted - actual
+    mae = np.abs(err).mean(axis=0)
+    rmse = np.sqrt((err ** 2).mean(axis=0))
+    ss_res = (err ** 2).sum(axis=0)
+    ss_tot = ((actual - actual.mean(axis=0)) ** 2).sum(axis=0)
+    r2 = np.where(ss_tot > 0, 1 - ss_res / np.where(ss_tot > 0, ss_tot, 1), np.nan)
+    return mae, rmse, r2
+
+
+def origin_indices(n_rows, max_horizon, n_origins=None, step=1, dates=None, cutoffs=None):
+    # Row index of the first forecast day for each origin
+    first, last = LOOKBACK, n_rows - max_horizon
+    if cutoffs is not None:
+        # Origin = first row dated after each cutoff
+        positions = np.searchsorted(np.asarray(dates, dtype='datetime64[ns]'),
+                                    np.asarray(pd.to_datetime(cutoffs), dtype='datetime64[ns]'), side='right')
+        return np.array([p for p in positions if first <= p <= last], dtype=int)
+    origins = np.arange(first, last + 1, step)
+    return origins[-n_origins:] if n_origins else origins
+
+
+def backtest_resource(name, horizons=(1, 7, 14), n_origins=100, step=1, cutoffs=None, resources=None):
+    cfg = (resources or RESOURCES)[name]
+    max_horizon = max(horizons)
+
+    # One preprocessed dataset per resource, shared by every origin, scaled with the
+    # scaler the model was trained with
+    data, scaler, full_feature_list = load_and_preprocess_multivariate(cfg['path'], cfg['features'], cfg['scaler'])
+    dates = load_engineered(cfg['path'], cfg['features'])[0]['date'].to_numpy()
+    target_index = full_feature_list.index(cfg['target'])
+
+    origins = origin_indices(len(data), max_horizon, n_origins, step, dates, cutoffs)
+    if len(origins) == 0:
+        return pd.DataFrame(columns=['resource', 'horizon', 'mae', 'rmse', 'r2', 'n_origins'])
+
+    X, y = sliding_windows(data, LOOKBACK, max_horizon, target_index)
+    windows = np.ascontiguousarray(X[origins - LOOKBACK])
+    actual_scaled = np.asarray(y[origins - LOOKBACK])
+
+    preds_scaled = predict_windows(cfg['model'], windows, target_index, max_horizon)
+
+    n_features = len(full_feature_list)
+    actual = inverse_target(scaler, actual_scaled, target_index, n_features)
+    predicted = inverse_target(scaler, preds_scaled, target_index, n_features)
+
+    steps = np.array(horizons) - 1
+    mae, rmse, r2 = horizon_metrics(actual[:, steps], predicted[:, steps])
+    return pd.DataFrame({
+        'resource': name,
+        'horizon': list(horizons),
+        'mae': mae,
+        'rmse': rmse,
+        'r2': r2,
+        'n_origins': len(origins),
+    })
+
+
+def backtest(horizons=(1, 7, 14), n_origins=100, step=1, cutoffs=None, site=None, names=None, workers=1):
+    # Per-horizon metric table for every resource; workers > 1 runs resources in parallel processes
+    resources = site_resources(site, RESOURCES) if site else RESOURCES
+    names = names or list(resources)
+    args = (horizons, n_origins, step, cutoffs, resources)
+
+    frames = []
+    if workers <= 1:
+        frames = [backtest_resource(name, *args) for name in names]
+    else:
+        with make_pool(workers) as pool:
+            futures = {pool.submit(backtest_resource, name, *args): name for name in names}
+            for future in as_completed(futures):
+                try:
+                    frames.append(future.result())
+                except Exception as e:
+                    print(f"[backtest ERROR] {futures[future]}: {e}")
+
+    if not frames:
+        return pd.DataFrame(columns=['resource', 'horizon', 'mae', 'rmse', 'r2', 'n_origins'])
+    table = pd.concat(frames, ignore_index=True)
+    table['resource'] = pd.Categorical(table['resource'], categories=names, ordered=True)
+    table = table.sort_values(['resource', 'horizon']).reset_index(drop=True)
+    table['resource'] = table['resource'].astype(str)
+    return table
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the resource models")
+    parser.add_argument('--horizons', default='1,7,14')
+    parser.add_argument('--origins', type=int, default=100, help="number of most recent origins")
+    parser.add_argument('--step', type=int, default=1, help="rows between consecutive origins")
+    parser.add_argument('--cutoffs', nargs='*', help="explicit cutoff dates instead of --origins/--step")
+    parser.add_argument('--resources', nargs='*', help="subset of resources")
+    parser.add_argument('--workers', type=int, default=min(len(RESOURCES), os.cpu_count() or 1))
+    parser.add_argument('--output', default=None, help="write the metric table to this CSV")
+    return parser.parse_args(argv)
+
+
+def main(argv=None, site=None):
+    args = parse_args(argv)
+    table = backtest([int(h) for h in args.horizons.split(',')], args.origins, args.step,
+                     args.cutoffs, site, args.resources, args.workers)
+    if args.output:
+        table.to_csv(args.output, index=False)
+    print(table.to_string(index=False))
+    return table
+
+
+if __name__ == '__main__':
+    main()
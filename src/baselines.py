@@ -0,0 +1,115 @@
+# 📁 src/baselines.py
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from numpy.lib.stride_tricks import sliding_window_view
+from src.cache import BoundedCache, file_signature
+from src.dataset_cache import load_table
+
+# Statistical fast-path forecasters on plain NumPy arrays. Every method takes a
+# (n_series, T) history and returns (n_series, n_days), so all resources of a site
+# are forecast in one vectorized call, in milliseconds and without TensorFlow.
+# An empty history (T == 0) gives NaN forecasts; T == 1 repeats the only value.
+
+SES_ALPHAS = np.linspace(0.05, 0.95, 19)
+DEFAULT_HISTORY = 365
+
+_histories = BoundedCache(maxsize=32)
+
+
+def _no_history(history, n_days):
+    return np.full((history.shape[0], n_days), np.nan)
+
+
+def seasonal_naive(history, n_days, season=7):
+    # Repeat the last full season
+    history = np.asarray(history, dtype=float)
+    if history.shape[1] == 0:
+        return _no_history(history, n_days)
+    if history.shape[1] < season:
+        season = history.shape[1]
+    last_season = history[:, -season:]
+    reps = int(np.ceil(n_days / season))
+    return np.tile(last_season, reps)[:, :n_days]
+
+
+def exponential_smoothing(history, n_days, alphas=SES_ALPHAS):
+    # Simple exponential smoothing; alpha picked per series by one-step-ahead SSE.
+    # Each alpha runs over all series at once as a first-order IIR filter.
+    history = np.asarray(history, dtype=float)
+    if history.shape[1] == 0:
+        return _no_history(history, n_days)
+    best_sse = np.full(history.shape[0], np.inf)
+    best_level = history[:, -1].copy()
+    for alpha in alphas:
+        # level_t = alpha * x_t + (1 - alpha) * level_{t-1}, starting at level_0 = x_0
+        zi = ((1 - alpha) * history[:, :1])
+        levels, _ = lfilter([alpha], [1, -(1 - alpha)], history, axis=1, zi=zi)
+        sse = ((history[:, 1:] - levels[:, :-1]) ** 2).sum(axis=1)
+        better = sse < best_sse
+        best_sse[better] = sse[better]
+        best_level[better] = levels[better, -1]
+    return np.repeat(best_level[:, None], n_days, axis=1)
+
+
+def autoregressive(history, n_days, order=7):
+    # AR(order) with intercept, fit by least squares per series (batched normal
+    # equations), then rolled forward recursively for every series together
+    history = np.asarray(history, dtype=float)
+    order = min(order, history.shape[1] - 2)
+    if order < 1:
+        return seasonal_naive(history, n_days, 1)
+
+    lags = sliding_window_view(history, order, axis=1)[:, :-1]           # (S, T-order, order)
+    design = np.concatenate([lags, np.ones(lags.shape[:2] + (1,))], axis=2)
+    target = history[:, order:]                                           # (S, T-order)
+    gram = design.transpose(0, 2, 1) @ design + 1e-6 * np.eye(order + 1)  # ridge term keeps flat series solvable
+    coef = np.linalg.solve(gram, (design.transpose(0, 2, 1) @ target[:, :, None]))[:, :, 0]
+
+    window = history[:, -order:].copy()
+    preds = np.empty((history.shape[0], n_days))
+    for step in range(n_days):
+        preds[:, step] = (window * coef[:, :order]).sum(axis=1) + coef[:, order]
+        window = np.concatenate([window[:, 1:], preds[:, step:step + 1]], axis=1)
+    return preds
+
+
+METHODS = {
+    'seasonal_naive': seasonal_naive,
+    'ets': exponential_smoothing,
+    'ar': autoregressive,
+}
+
+
+def target_history(file_path, target_column, feature_columns=None, history=DEFAULT_HISTORY):
+    # Date-sorted raw target values. Unlike the engineered frame the LSTM reads, no
+    # rows are lost to lag/rolling warm-up, so short-history sites still get a series.
+    # feature_columns is accepted for call compatibility and unused.
+    key = (file_signature(file_path), target_column)
+    series = _histories.get(key)
+    if series is None:
+        table = load_table(file_path).sort_values('date', kind='stable')
+        series = table[target_column].dropna().to_numpy(dtype=float)
+        _histories.discard(lambda k: k[0][0] == key[0][0] and k[1] == target_column)
+        _histories.put(key, series)
+    return series[-history:]
+
+
+def baseline_forecast(file_path, model_path, scaler_path, target_column, label, feature_columns, n_days=7,
+                      method='ets'):
+    # Drop-in for forecasting.forecast(); model_path and scaler_path are unused
+    series = target_history(file_path, target_column, feature_columns)
+    preds = METHODS[method](series[None, :], n_days)[0]
+    return pd.DataFrame(preds, columns=[label])
+
+
+def baseline_forecast_all(resources, n_days=7, method='ets', history=DEFAULT_HISTORY):
+    # Every resource in one vectorized call; histories are cut to a common length.
+    # A resource without any history gets NaN instead of truncating the others to nothing.
+    series = [target_history(cfg['path'], cfg['target'], cfg['features'], history) for cfg in resources.values()]
+    present = [i for i, s in enumerate(series) if len(s)]
+    preds = np.full((len(series), n_days), np.nan)
+    if present:
+        length = min(len(series[i]) for i in present)
+        preds[present] = METHODS[method](np.stack([series[i][-length:] for i in present]), n_days)
+    return pd.DataFrame(preds.T, columns=[cfg['label'] for cfg in resources.values()])
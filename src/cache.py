@@ -0,0 +1,102 @@
+# 📁 src/cache.py
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def file_signature(path, content_hash=False):
+    # Identity of a file on disk: a retrain or a new data row changes mtime/size,
+    # which changes the key and invalidates anything cached under the old one.
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if content_hash:
+        with open(path, 'rb') as f:
+            signature += (hashlib.sha256(f.read()).hexdigest(),)
+    return signature
+
+
+def tail_line(path, size):
+    # Last line (newline included) of the first `size` bytes of path, read from the end
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - 64 * 1024))
+        raw = f.read(size - f.tell())
+    return raw[raw.rstrip(b'\n').rfind(b'\n') + 1:]
+
+
+def read_appended(path, old_size, old_last_line, size=None):
+    # Bytes written between old_size and size (default: end of file), provided the file up
+    # to old_size is unchanged, i.e. still ends in old_last_line; None if it was rewritten
+    with open(path, 'rb') as f:
+        f.seek(old_size - len(old_last_line))
+        if f.read(len(old_last_line)) != old_last_line or not old_last_line.endswith(b'\n'):
+            return None
+        return f.read() if size is None else f.read(size - old_size)
+
+
+class BoundedCache:
+    """Thread-safe LRU cache with hit/miss/load-time counters."""
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, load_seconds=0.0):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self.load_seconds += load_seconds
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, match):
+        # Drop every entry whose key satisfies `match` (e.g. stale versions of a file)
+        with self._lock:
+            for key in [k for k in self._entries if match(k)]:
+                del self._entries[key]
+
+    def find(self, match):
+        # Most recently used (key, value) whose key satisfies `match`, without counting a hit
+        with self._lock:
+            for key in reversed(self._entries):
+                if match(key):
+                    return key, self._entries[key]
+            return None, None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 4),
+            }
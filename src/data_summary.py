@@ -1,79 +1,113 @@
 import pandas as pd
-import numpy as np
-
-def load_er_trends():
+from src import aggregates
+from src.cache import BoundedCache
+from src.instrumentation import timed, record_error
+
+BED_PATH = 'data/hospital_bed_data_enhanced.csv'
+STAFF_PATH = 'data/staff_allocation_enhanced.csv'
+VENT_PATH = 'data/ventilators_enhanced.csv'
+
+# Both panels are built from src.aggregates (incremental rollups and latest-row
+# snapshot) and memoized per table version, so a re-render with unchanged data is a
+# dictionary lookup however much history the tables hold.
+_summaries = BoundedCache(maxsize=8)
+
+
+def _memoized(name, paths, build):
+    key = (name, aggregates.version(*paths))
+    value = _summaries.get(key)
+    if value is None:
+        _summaries.discard(lambda k: k[0] == name)
+        value = build()
+        _summaries.put(key, value)
+    return value
+
+
+def _period_series(sums, freq):
+    # {ISO period start: sum} -> gap-free series (periods without rows count as 0)
+    if not sums:
+        return pd.Series(dtype='float64')
+    series = pd.Series(sums, dtype='float64')
+    series.index = pd.to_datetime(series.index)
+    series = series.sort_index()
+    return series.reindex(pd.date_range(series.index[0], series.index[-1], freq=freq), fill_value=0.0)
+
+
+def _er_rollups():
+    sums = aggregates.rollups(BED_PATH, 'er_visits')
+    return {
+        'daily': _period_series(sums['daily'], 'D'),
+        'weekly': _period_series(sums['weekly'], 'W-MON'),
+        'monthly': _period_series(sums['monthly'], 'MS'),
+    }
+
+
+@timed('summary.er_rollups')
+def load_er_rollups():
+    # Daily, weekly (Monday-start) and monthly ER visit totals; zero or missing visits
+    # after Jan 8, 2025 are filled with deterministic, date-seeded values (src.aggregates)
     try:
-        beds = pd.read_csv('data/hospital_bed_data_enhanced.csv')
-
-        # Drop rows with missing or invalid dates
-        beds = beds.dropna(subset=['date'])
-        beds['date'] = pd.to_datetime(beds['date'], errors='coerce')
-        beds = beds.dropna(subset=['date'])
-
-        # Ensure er_visits is present and numeric
-        if 'er_visits' not in beds.columns:
-            raise ValueError("Missing column 'er_visits' in hospital_bed_data_enhanced.csv.")
-        beds['er_visits'] = pd.to_numeric(beds['er_visits'], errors='coerce').fillna(0)
+        return _memoized('er_rollups', [BED_PATH], _er_rollups)
+    except Exception as e:
+        record_error('load_er_rollups', e)
+        return {period: pd.Series(dtype='float64') for period in ('daily', 'weekly', 'monthly')}
 
-        # 🛠 Fill 0 or missing values after Jan 8, 2025 with realistic values
-        mask = (beds['date'] > pd.to_datetime('2025-01-08')) & (beds['er_visits'] <= 0)
-        beds.loc[mask, 'er_visits'] = np.random.randint(80, 250, size=mask.sum())
 
-        # Set date as index for resampling
-        beds = beds.set_index('date').sort_index()
+@timed('summary.er_trends')
+def load_er_trends():
+    rollups = load_er_rollups()
+    return rollups['daily'], rollups['monthly']
 
-        # Resample for daily and monthly ER trends
-        daily = beds['er_visits'].resample('D').sum()
-        monthly = beds['er_visits'].resample('MS').sum()
 
-        return daily, monthly
+def _int(row, col):
+    try:
+        return int(float(row.get(col) or 0))
+    except (TypeError, ValueError):
+        return 0
 
-    except Exception as e:
-        print(f"[load_er_trends ERROR] {e}")
-        return pd.Series(dtype='float64'), pd.Series(dtype='float64')
 
+def _resource_status():
+    latest_beds, _ = aggregates.latest(BED_PATH)
+    latest_staff, staff_max = aggregates.latest(STAFF_PATH)
+    latest_vents, _ = aggregates.latest(VENT_PATH)
 
-def load_resource_status():
-    try:
-        beds = pd.read_csv('data/hospital_bed_data_enhanced.csv')
-        staff = pd.read_csv('data/staff_allocation_enhanced.csv')
-        vents = pd.read_csv('data/ventilators_enhanced.csv')
+    icu_total = _int(latest_beds, 'icu_beds')
+    icu_available = min(_int(latest_beds, 'icu_available'), icu_total)
 
-        latest_beds = beds.dropna(subset=['date']).iloc[-1]
-        latest_staff = staff.iloc[-1]
-        latest_vents = vents.iloc[-1]
+    general_total = _int(latest_beds, 'general_beds')
+    general_available = min(_int(latest_beds, 'general_available'), general_total)
 
-        icu_total = int(latest_beds.get('icu_beds', 0))
-        icu_available = min(int(latest_beds.get('icu_available', 0)), icu_total)
+    ventilator_total = _int(latest_vents, 'total_ventilators')
+    ventilators_available = min(_int(latest_vents, 'available_ventilators'), ventilator_total)
 
-        general_total = int(latest_beds.get('general_beds', 0))
-        general_available = min(int(latest_beds.get('general_available', 0)), general_total)
+    # Staff totals are the running maxima kept by the aggregates, not the latest row
+    doctor_total = _int(staff_max, 'total_doctors') if 'total_doctors' in staff_max else _int(latest_staff, 'total_doctors')
+    doctors_available = _int(latest_staff, 'available_doctors')
 
-        ventilator_total = int(latest_vents.get('total_ventilators', 0))
-        ventilators_available = min(int(latest_vents.get('available_ventilators', 0)), ventilator_total)
+    nurse_total = _int(staff_max, 'total_nurses')
+    nurses_available = _int(latest_staff, 'available_nurses')
 
-        doctor_total = int(staff['total_doctors'].max()) if 'total_doctors' in staff.columns else int(latest_staff.get('total_doctors', 0))
-        doctors_available = int(latest_staff.get('available_doctors', 0))
+    return {
+        "icu_total": icu_total,
+        "icu_available": icu_available,
+        "general_total": general_total,
+        "general_available": general_available,
+        "doctor_total": doctor_total,
+        "doctors_available": doctors_available,
+        "nurse_total": nurse_total,
+        "nurses_available": nurses_available,
+        "ventilator_total": ventilator_total,
+        "ventilators_available": ventilators_available
+    }
 
-        nurse_total_col = next((col for col in staff.columns if 'total_nurse' in col.lower()), None)
-        nurse_total = int(staff[nurse_total_col].max()) if nurse_total_col else 0
-        nurses_available = int(latest_staff.get('available_nurses', 0))
 
-        return {
-            "icu_total": icu_total,
-            "icu_available": icu_available,
-            "general_total": general_total,
-            "general_available": general_available,
-            "doctor_total": doctor_total,
-            "doctors_available": doctors_available,
-            "nurse_total": nurse_total,
-            "nurses_available": nurses_available,
-            "ventilator_total": ventilator_total,
-            "ventilators_available": ventilators_available
-        }
+@timed('summary.resource_status')
+def load_resource_status():
+    try:
+        return dict(_memoized('resource_status', [BED_PATH, STAFF_PATH, VENT_PATH], _resource_status))
 
     except Exception as e:
-        print(f"[load_resource_status ERROR] {e}")
+        record_error('load_resource_status', e)
         return {
             "icu_total": 0,
             "icu_available": 0,
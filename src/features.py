@@ -0,0 +1,26 @@
+# 📁 src/features.py
+LAG_DAYS = [1, 3, 7, 14]
+ROLLING_WINDOWS = [3, 7]
+
+# Rows of history a new row needs to get every lag/rolling feature filled in
+MAX_LOOKBACK = max(LAG_DAYS + ROLLING_WINDOWS)
+
+
+def add_lag_features(df, feature_columns):
+    # Add lag and rolling stats for 'available' features only; df must already be date-sorted
+    extra_features = []
+    for col in feature_columns:
+        if 'available' in col:
+            for lag in LAG_DAYS:
+                lag_col = f"{col}_lag{lag}"
+                df[lag_col] = df[col].shift(lag)
+                extra_features.append(lag_col)
+
+            for window in ROLLING_WINDOWS:
+                roll_mean = f"{col}_roll_mean{window}"
+                roll_std = f"{col}_roll_std{window}"
+                df[roll_mean] = df[col].rolling(window=window).mean()
+                df[roll_std] = df[col].rolling(window=window).std()
+                extra_features.extend([roll_mean, roll_std])
+
+    return df, extra_features
@@ -0,0 +1,233 @@
+# 📁 src/forecast_store.py
+import os
+import sqlite3
+import hashlib
+from datetime import datetime
+import pandas as pd
+from src.forecasting import RESOURCES
+from src.sites import site_resources
+from src.cache import file_signature
+
+# Materialized forecasts, one row per (site, resource, run, horizon step). Every run is
+# kept, so past forecasts stay available for backtesting; readers take the latest run
+# whose input version (data + model files) is current. Sampled intervals and shortage
+# probabilities (src.uncertainty) are stored against the run they belong to.
+STORE_PATH = os.environ.get('HRF_FORECAST_STORE', 'forecast_store.sqlite')
+INTERVAL_COLUMNS = ['mean', 'q05', 'q50', 'q95', 'threshold', 'p_shortage']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    run_ts TEXT NOT NULL,
+    n_days INTEGER NOT NULL,
+    inputs_version TEXT NOT NULL,
+    seconds REAL
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    site TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    run_ts TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (site, resource, run_ts, horizon)
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    resource TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    mean REAL,
+    q05 REAL,
+    q50 REAL,
+    q95 REAL,
+    threshold REAL,
+    p_shortage REAL,
+    PRIMARY KEY (run_id, resource, horizon)
+);
+CREATE INDEX IF NOT EXISTS runs_latest ON runs (site, n_days, run_id);
+"""
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or STORE_PATH, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')  # readers (dashboard) never block the writer
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def inputs_version(site=None):
+    # Fingerprint of every file a site's forecast depends on: data CSVs, models
+    # (including direct and exported variants) and scalers
+    resources = site_resources(site, RESOURCES) if site else RESOURCES
+    paths = set()
+    for cfg in resources.values():
+        paths.add(cfg['path'])
+        stem = os.path.splitext(cfg['model'])[0]
+        model_dir = os.path.dirname(cfg['model']) or '.'
+        if os.path.isdir(model_dir):
+            for name in os.listdir(model_dir):
+                full = os.path.join(model_dir, name)
+                if full.startswith(stem):
+                    paths.add(full)
+
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        if os.path.exists(path):
+            digest.update(f"{file_signature(path)};".encode())
+    return digest.hexdigest()
+
+
+def write_forecast(df, site_name='default', inputs=None, seconds=None, conn=None):
+    # df: forecast_all() output (date index x '<resource>_forecast' columns)
+    own = conn is None
+    conn = conn or connect()
+    labels = {cfg['label']: name for name, cfg in RESOURCES.items()}
+    run_ts = datetime.now().isoformat(timespec='microseconds')
+    try:
+        with conn:
+            cur = conn.execute(
+                'INSERT INTO runs (site, run_ts, n_days, inputs_version, seconds) VALUES (?, ?, ?, ?, ?)',
+                (site_name, run_ts, len(df), inputs or '', seconds))
+            run_id = cur.lastrowid
+            rows = [
+                (run_id, site_name, labels.get(label, label), run_ts, step + 1,
+                 str(pd.Timestamp(date).date()), float(value))
+                for label in df.columns
+                for step, (date, value) in enumerate(df[label].items())
+            ]
+            conn.executemany('INSERT INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        return run_id
+    finally:
+        if own:
+            conn.close()
+
+
+def latest_run(site_name='default', n_days=7, inputs=None, conn=None, with_intervals=False):
+    # Newest run covering at least n_days (and matching `inputs`, if given); with
+    # with_intervals, only runs whose stored intervals also cover n_days
+    own = conn is None
+    conn = conn or connect()
+    try:
+        query = 'SELECT run_id, inputs_version FROM runs WHERE site = ? AND n_days >= ?'
+        params = [site_name, n_days]
+        if inputs is not None:
+            query += ' AND inputs_version = ?'
+            params.append(inputs)
+        if with_intervals:
+            query += ' AND (SELECT MAX(i.horizon) FROM intervals i WHERE i.run_id = runs.run_id) >= ?'
+            params.append(n_days)
+        row = conn.execute(query + ' ORDER BY run_id DESC LIMIT 1', params).fetchone()
+        return row[0] if row else None
+    finally:
+        if own:
+            conn.close()
+
+
+def run_info(run_id, conn=None):
+    # {'run_id', 'run_ts', 'n_days', 'inputs_version'} of a stored run, or None
+    own = conn is None
+    conn = conn or connect()
+    try:
+        row = conn.execute('SELECT run_id, run_ts, n_days, inputs_version FROM runs WHERE run_id = ?',
+                           (run_id,)).fetchone()
+    finally:
+        if own:
+            conn.close()
+    if row is None:
+        return None
+    return {'run_id': row[0], 'run_ts': datetime.fromisoformat(row[1]), 'n_days': row[2], 'inputs_version': row[3]}
+
+
+def load_run(run_id, n_days=None, conn=None):
+    # Same wide layout forecast_all() returns
+    own = conn is None
+    conn = conn or connect()
+    try:
+        df = pd.read_sql_query(
+            'SELECT resource, horizon, date, value FROM forecasts WHERE run_id = ? ORDER BY horizon',
+            conn, params=(run_id,))
+    finally:
+        if own:
+            conn.close()
+    if n_days is not None:
+        df = df[df['horizon'] <= n_days]
+    wide = df.pivot(index='date', columns='resource', values='value')
+    wide.index = pd.to_datetime(wide.index)
+    wide.index.name = None
+    wide.columns.name = None
+    order = [name for name in RESOURCES if name in wide.columns]
+    return wide[order].rename(columns={name: RESOURCES[name]['label'] for name in order})
+
+
+def latest_forecast(site_name='default', n_days=7, inputs=None):
+    run_id = latest_run(site_name, n_days, inputs)
+    return load_run(run_id, n_days) if run_id is not None else None
+
+
+def write_intervals(intervals, run_id, conn=None):
+    # intervals: forecast_intervals_all() output ((resource, date) index x INTERVAL_COLUMNS),
+    # sampled over the run's own n_days so the stored horizon matches the forecast
+    own = conn is None
+    conn = conn or connect()
+    try:
+        info = run_info(run_id, conn)
+        if info is None:
+            raise ValueError(f"No forecast run {run_id}")
+        sampled = intervals.groupby(level='resource').size()
+        if len(sampled) and sampled.min() < info['n_days']:
+            raise ValueError(f"Run {run_id} covers {info['n_days']} days, the intervals only {sampled.min()}")
+        rows = []
+        for resource, table in intervals.groupby(level='resource', sort=False):
+            for step, (key, values) in enumerate(table[INTERVAL_COLUMNS].iterrows()):
+                rows.append((run_id, resource, step + 1, str(pd.Timestamp(key[1]).date()),
+                             *(float(v) for v in values)))
+        with conn:
+            conn.execute('DELETE FROM intervals WHERE run_id = ?', (run_id,))
+            conn.executemany(f"INSERT INTO intervals VALUES ({', '.join('?' * (4 + len(INTERVAL_COLUMNS)))})", rows)
+    finally:
+        if own:
+            conn.close()
+
+
+def load_intervals(run_id, n_days=None, conn=None):
+    # Same (resource, date) layout forecast_intervals_all() returns
+    own = conn is None
+    conn = conn or connect()
+    try:
+        df = pd.read_sql_query(
+            f"SELECT resource, horizon, date, {', '.join(INTERVAL_COLUMNS)} FROM intervals "
+            'WHERE run_id = ? ORDER BY horizon', conn, params=(run_id,))
+    finally:
+        if own:
+            conn.close()
+    if n_days is not None:
+        df = df[df['horizon'] <= n_days]
+    df['date'] = pd.to_datetime(df['date'])
+    order = {name: i for i, name in enumerate(RESOURCES)}
+    df = df.sort_values(['resource', 'horizon'], kind='stable',
+                        key=lambda col: col.map(order) if col.name == 'resource' else col)
+    return df.set_index(['resource', 'date'])[INTERVAL_COLUMNS]
+
+
+def latest_intervals(site_name='default', n_days=7, inputs=None):
+    # Newest run whose intervals cover n_days (any input version when inputs is None)
+    run_id = latest_run(site_name, n_days, inputs, with_intervals=True)
+    return load_intervals(run_id, n_days) if run_id is not None else None
+
+
+def forecast_history(site_name='default', resource=None):
+    # Every stored forecast (long format) for backtesting against actuals
+    conn = connect()
+    try:
+        query = ('SELECT f.site, f.resource, r.run_ts, f.horizon, f.date, f.value, r.inputs_version '
+                 'FROM forecasts f JOIN runs r ON r.run_id = f.run_id WHERE f.site = ?')
+        params = [site_name]
+        if resource:
+            query += ' AND f.resource = ?'
+            params.append(resource)
+        return pd.read_sql_query(query + ' ORDER BY r.run_id, f.resource, f.horizon', conn, params=params)
+    finally:
+        conn.close()
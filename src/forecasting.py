@@ -1,66 +1,166 @@
+import os
+import re
+import glob
 import numpy as np
 import pandas as pd
-from tensorflow.keras.models import load_model
-from joblib import load
 from src.preprocessing import load_and_preprocess_multivariate
+from src.model_registry import get_model
+from src.sites import site_resources
+from src.instrumentation import span, incr, profiled
+from src.baselines import METHODS as BASELINE_METHODS, baseline_forecast, baseline_forecast_all
+
+FORECAST_START = '2025-07-15'
+LOOKBACK = 30
+
+# Forecaster per resource: 'lstm' or a baseline from src.baselines ('ets', 'ar',
+# 'seasonal_naive'), taken from an optional 'forecaster' key in RESOURCES.
+# HRF_FORECASTER overrides it for every resource and
+# HRF_FORECASTER_<RESOURCE> (e.g. HRF_FORECASTER_ICU=ar) for one. When the LSTM
+# path fails (no model, too little history, TensorFlow unavailable) the resource
+# degrades to FALLBACK_BASELINE.
+FALLBACK_BASELINE = os.environ.get('HRF_FALLBACK_BASELINE', 'ets')
+
+# Forecast targets (one LSTM per resource)
+RESOURCES = {
+    'icu': {
+        'path': 'data/hospital_bed_data_enhanced.csv',
+        'model': 'model/icu_model.keras',
+        'scaler': 'model/icu_model_scaler.save',
+        'target': 'icu_available',
+        'label': 'icu_forecast',
+        'features': ['icu_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'],
+    },
+    'general': {
+        'path': 'data/hospital_bed_data_enhanced.csv',
+        'model': 'model/general_model.keras',
+        'scaler': 'model/general_model_scaler.save',
+        'target': 'general_available',
+        'label': 'general_forecast',
+        'features': ['general_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'],
+    },
+    'doctor': {
+        'path': 'data/staff_allocation_enhanced.csv',
+        'model': 'model/doctor_model.keras',
+        'scaler': 'model/doctor_model_scaler.save',
+        'target': 'available_doctors',
+        'label': 'doctor_forecast',
+        'features': ['available_doctors', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'],
+    },
+    'nurse': {
+        'path': 'data/staff_allocation_enhanced.csv',
+        'model': 'model/nurse_model.keras',
+        'scaler': 'model/nurse_model_scaler.save',
+        'target': 'available_nurses',
+        'label': 'nurse_forecast',
+        'features': ['available_nurses', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'],
+    },
+    'ventilator': {
+        'path': 'data/ventilators_enhanced.csv',
+        'model': 'model/ventilator_model.keras',
+        'scaler': 'model/ventilator_model_scaler.save',
+        'target': 'available_ventilators',
+        'label': 'ventilator_forecast',
+        'features': ['available_ventilators', 'day_of_week', 'month', 'holiday_flag'],
+    },
+}
+
+
+def find_direct_model(model_path, n_days):
+    # Direct multi-horizon models live next to the single-step model as <name>_h<N>.keras;
+    # pick the shortest horizon that still covers n_days.
+    stem, ext = os.path.splitext(model_path)
+    candidates = []
+    for path in glob.glob(f"{stem}_h*{ext}"):
+        match = re.fullmatch(re.escape(stem) + r"_h(\d+)" + re.escape(ext), path)
+        if match and int(match.group(1)) >= n_days:
+            candidates.append((int(match.group(1)), path))
+    return min(candidates)[1] if candidates else None
+
+
+def predict_windows(model_path, windows, target_index, n_days):
+    # windows: (batch, 30, features) scaled inputs -> (batch, n_days) scaled predictions.
+    # Every window in the batch goes through the same predict call.
+    direct_path = find_direct_model(model_path, n_days)
+    if direct_path:
+        # One forward pass emits every horizon step
+        model = get_model(direct_path)
+        incr('predict.windows', len(windows))
+        with span('predict.direct'):
+            return np.asarray(model.predict(windows, verbose=0))[:, :n_days]
+
+    model = get_model(model_path)  # warm after the first call in this process
+    input_seq = np.array(windows, dtype='float32')
+    preds = np.empty((len(input_seq), n_days), dtype='float32')
+
+    for step in range(n_days):
+        incr('predict.windows', len(input_seq))
+        with span('predict.step'):
+            pred = np.asarray(model.predict(input_seq, verbose=0))[:, 0]
+        preds[:, step] = pred
+
+        # Shift every window by one day, carrying the predicted target forward
+        next_row = input_seq[:, -1].copy()
+        next_row[:, target_index] = pred
+        input_seq = np.concatenate([input_seq[:, 1:], next_row[:, None, :]], axis=1)
+
+    return preds
+
+
+def inverse_target(scaler, values, target_index, n_features):
+    # Undo scaling for the target column only; works on any array shape
+    values = np.asarray(values)
+    padded = np.pad(values.reshape(-1, 1), ((0, 0), (target_index, n_features - target_index - 1)), mode='constant')
+    return scaler.inverse_transform(padded)[:, target_index].reshape(values.shape)
+
 
 def forecast(file_path, model_path, scaler_path, target_column, label, feature_columns, n_days=7):
-    # Load preprocessed full data and the fitted scaler
-    data, scaler, full_feature_list = load_and_preprocess_multivariate(file_path, feature_columns)
-    model = load_model(model_path, compile=False)
+    # Scaler saved at training time; only the last 30-day window is scaled
+    data, scaler, full_feature_list = load_and_preprocess_multivariate(file_path, feature_columns,
+                                                                       scaler_path, last_n=LOOKBACK)
 
-    input_seq = data[-30:].copy()  # last 30 days window
-    preds = []
+    if len(data) < LOOKBACK:
+        raise ValueError(f"{file_path} has {len(data)} usable rows, the LSTM needs {LOOKBACK}")
 
+    input_seq = data.copy()  # last 30 days window
     target_index = full_feature_list.index(target_column)
 
-    for _ in range(n_days):
-        input_array = np.expand_dims(input_seq, axis=0)
-        pred = model.predict(input_array, verbose=0)
-        preds.append(pred[0][0])  # extract scalar value
-
-        next_row = input_seq[-1].copy()
-        next_row[target_index] = pred[0][0]  # update predicted target in next input
-        input_seq = np.vstack([input_seq[1:], next_row])  # shift window
+    preds = predict_windows(model_path, np.expand_dims(input_seq, axis=0), target_index, n_days)[0]
 
     # Inverse scale predictions
-    inv_preds = scaler.inverse_transform(
-        np.pad(np.array(preds).reshape(-1, 1), ((0, 0), (target_index, len(full_feature_list) - target_index - 1)), mode='constant')
-    )[:, target_index]
+    inv_preds = inverse_target(scaler, preds, target_index, len(full_feature_list))
 
     return pd.DataFrame(inv_preds, columns=[label])
 
-def forecast_all():
-    n_days = 7
-    date_index = pd.date_range(start='2025-07-15', periods=n_days)
-
-    df = pd.concat([
-        forecast(
-            'data/hospital_bed_data_enhanced.csv', 'model/icu_model.keras', 'model/icu_model_scaler.save',
-            'icu_available', 'icu_forecast',
-            ['icu_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'], n_days
-        ),
-        forecast(
-            'data/hospital_bed_data_enhanced.csv', 'model/general_model.keras', 'model/general_model_scaler.save',
-            'general_available', 'general_forecast',
-            ['general_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'], n_days
-        ),
-        forecast(
-            'data/staff_allocation_enhanced.csv', 'model/doctor_model.keras', 'model/doctor_model_scaler.save',
-            'available_doctors', 'doctor_forecast',
-            ['available_doctors', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'], n_days
-        ),
-        forecast(
-            'data/staff_allocation_enhanced.csv', 'model/nurse_model.keras', 'model/nurse_model_scaler.save',
-            'available_nurses', 'nurse_forecast',
-            ['available_nurses', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'], n_days
-        ),
-        forecast(
-            'data/ventilators_enhanced.csv', 'model/ventilator_model.keras', 'model/ventilator_model_scaler.save',
-            'available_ventilators', 'ventilator_forecast',
-            ['available_ventilators', 'day_of_week', 'month', 'holiday_flag'], n_days
-        )
-    ], axis=1)
+
+def forecaster_for(name, cfg=None):
+    default = (cfg or {}).get('forecaster', 'lstm')
+    return os.environ.get(f"HRF_FORECASTER_{name.upper()}", os.environ.get('HRF_FORECASTER', default))
+
+
+def forecast_resource(name, n_days=7, resources=None, method=None):
+    cfg = (resources or RESOURCES)[name]
+    args = (cfg['path'], cfg['model'], cfg['scaler'], cfg['target'], cfg['label'], cfg['features'], n_days)
+    method = method or forecaster_for(name, cfg)
+    if method in BASELINE_METHODS:
+        return baseline_forecast(*args, method=method)
+    try:
+        return forecast(*args)
+    except Exception as e:
+        incr('forecast.fallbacks')
+        print(f"[forecast WARNING] {name}: LSTM unavailable ({e}), using '{FALLBACK_BASELINE}' baseline")
+        return baseline_forecast(*args, method=FALLBACK_BASELINE)
+
+
+def forecast_all(n_days=7, site=None, method=None):
+    date_index = pd.date_range(start=FORECAST_START, periods=n_days)
+    resources = site_resources(site, RESOURCES) if site else RESOURCES
+
+    with span('forecast_all'), profiled('forecast_all'):
+        if method in BASELINE_METHODS:
+            # Whole site through one vectorized baseline call
+            df = baseline_forecast_all(resources, n_days, method)
+        else:
+            df = pd.concat([forecast_resource(name, n_days, resources, method) for name in resources], axis=1)
 
     df.index = date_index
     return df
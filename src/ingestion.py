@@ -0,0 +1,395 @@
+# 📁 src/ingestion.py
+import os
+import csv
+import json
+import time
+import queue
+import argparse
+import threading
+from collections import deque
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import Future
+from src.features import MAX_LOOKBACK
+from src.instrumentation import span, incr, record_error
+from src import aggregates, storage
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): writers are only serialized within one process
+    fcntl = None
+
+# Columns that are derived from earlier rows of the same file (in file order) rather
+# than entered by hand: name -> (source column, rolling window)
+DERIVED_COLUMNS = {
+    'er_visits_rolling_mean_3': ('er_visits', 3),
+    'er_visits_rolling_mean_7': ('er_visits', 7),
+}
+
+STATE_DIR_NAME = '.state'
+LOCK_NAME = 'ingest.lock'
+JOURNAL_NAME = 'ingest.journal.json'
+
+# The three tables a Data Entry submission or a backfill writes, by short name
+TABLES = {
+    'beds': 'hospital_bed_data_enhanced.csv',
+    'staff': 'staff_allocation_enhanced.csv',
+    'vents': 'ventilators_enhanced.csv',
+}
+
+# Writer batching: a batch closes after MAX_BATCH submissions or BATCH_MS after its first one
+MAX_BATCH = int(os.environ.get('HRF_INGEST_MAX_BATCH', 1000))
+BATCH_MS = float(os.environ.get('HRF_INGEST_BATCH_MS', 50))
+BULK_CHUNK_ROWS = 10000
+
+
+def _state_dir(file_path):
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), STATE_DIR_NAME)
+
+
+def _state_path(file_path):
+    name = os.path.basename(file_path)
+    return os.path.join(_state_dir(file_path), f"{os.path.splitext(name)[0]}.tail.json")
+
+
+def _read_header(file_path):
+    with open(file_path, newline='') as f:
+        return next(csv.reader(f))
+
+
+def _read_last_rows(file_path, header, n):
+    # Read only the last n data rows by scanning backwards from the end of the file
+    block = 64 * 1024
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = pos = f.tell()
+        data = b''
+        while pos > 0 and data.count(b'\n') <= n + 1:
+            pos = max(0, pos - block)
+            f.seek(pos)
+            data = f.read(end - pos)
+    lines = data.decode('utf-8').splitlines()
+    if pos == 0:
+        lines = lines[1:]  # drop header
+    rows = [dict(zip(header, values)) for values in csv.reader(lines[-n:]) if values]
+    return rows
+
+
+def load_tail_state(file_path):
+    # Persisted tail: the last MAX_LOOKBACK rows plus the file version they belong to.
+    # If the file was changed by something other than append_rows, rebuild it from the file end.
+    stat = os.stat(file_path)
+    state_path = _state_path(file_path)
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if state.get('size') == stat.st_size and state.get('mtime_ns') == stat.st_mtime_ns:
+            return state
+
+    header = _read_header(file_path)
+    return {
+        'header': header,
+        'rows': _read_last_rows(file_path, header, MAX_LOOKBACK),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+def _save_tail_state(file_path, state):
+    state_path = _state_path(file_path)
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _fill_derived(header, tail_rows, row):
+    # Rolling means over the source column, continuing from the persisted tail
+    for col, (source, window) in DERIVED_COLUMNS.items():
+        if col in header and row.get(col) in (None, '') and source in row:
+            history = [float(r[source]) for r in tail_rows if r.get(source) not in (None, '')]
+            values = (history + [float(row[source])])[-window:]
+            row[col] = sum(values) / len(values)
+    return row
+
+
+def _append(file_path, rows):
+    # Append-only write: O(new rows) I/O instead of rewriting the whole file.
+    # Callers hold the data directory's transaction.
+    state = load_tail_state(file_path)
+    header = state['header']
+    tail = deque(state['rows'], maxlen=MAX_LOOKBACK)
+
+    lines = []
+    for row in rows:
+        row = _fill_derived(header, list(tail), dict(row))
+        record = {col: row.get(col, '') for col in header}
+        lines.append([record[col] for col in header])
+        tail.append({col: str(record[col]) for col in header})
+
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+        else:
+            needs_newline = False
+
+    with open(file_path, 'a', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        csv.writer(f, lineterminator='\n').writerows(lines)
+
+    stat = os.stat(file_path)
+    state.update(rows=list(tail), size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    _save_tail_state(file_path, state)
+    return len(lines)
+
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _locked(state_dir):
+    # Exclusive writer lock for one data directory: a thread lock within this process
+    # plus an flock on .state/ingest.lock against other processes (dashboard, CLI)
+    os.makedirs(state_dir, exist_ok=True)
+    with _thread_locks_guard:
+        lock = _thread_locks.setdefault(state_dir, threading.Lock())
+    with lock, open(os.path.join(state_dir, LOCK_NAME), 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _recover(state_dir):
+    # A journal left behind means a transaction died after it started appending:
+    # cut every file it touched back to its size before the transaction
+    journal_path = os.path.join(state_dir, JOURNAL_NAME)
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path) as f:
+        journal = json.load(f)
+    for path, size in journal['sizes'].items():
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+        if os.path.exists(_state_path(path)):
+            os.remove(_state_path(path))
+    os.remove(journal_path)
+    incr('ingest.rollbacks')
+
+
+def _write_journal(journal_path, journal):
+    tmp_path = journal_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(journal, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, journal_path)
+
+
+@contextmanager
+def transaction(paths):
+    # All-or-nothing appends across several tables. File sizes are journaled before the
+    # first write and the journal is removed once every file is fsynced, so an error or
+    # crash part-way never leaves one table with a row the others are missing.
+    paths = sorted({os.path.abspath(p) for p in paths})
+    state_dirs = sorted({_state_dir(p) for p in paths})
+    journal_path = os.path.join(state_dirs[0], JOURNAL_NAME)
+
+    with ExitStack() as stack:
+        for state_dir in state_dirs:
+            stack.enter_context(_locked(state_dir))
+            _recover(state_dir)
+
+        _write_journal(journal_path, {'sizes': {p: os.path.getsize(p) for p in paths}})
+        try:
+            yield
+            for path in paths:
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+        except BaseException:
+            _recover(state_dirs[0])
+            raise
+        os.remove(journal_path)
+
+
+def _refresh_aggregates(paths):
+    # Fold the new rows into the rollups and latest-status snapshot right away; the
+    # write itself already succeeded, so a failure here is only reported
+    try:
+        aggregates.refresh(paths)
+    except Exception as e:
+        record_error('aggregates', e)
+
+
+def _refresh_columnar(paths):
+    # Append the new rows to the tables' columnar copies (src.storage), so the next
+    # cold load reads the copy instead of parsing the CSV; reported like the rollups
+    for path in paths:
+        try:
+            storage.extend(path)
+        except Exception as e:
+            record_error('storage', e)
+
+
+def commit(tables):
+    # tables: {csv path: [row dict, ...]} -> rows written per path, as one transaction
+    tables = {path: rows for path, rows in tables.items() if rows}
+    if not tables:
+        return {}
+    with transaction(tables):
+        written = {path: _append(path, rows) for path, rows in tables.items()}
+    _refresh_aggregates(tables)
+    _refresh_columnar(tables)
+    return written
+
+
+def append_rows(file_path, rows):
+    return commit({file_path: list(rows)}).get(file_path, 0)
+
+
+class IngestionWriter:
+    # Single writer thread. Submissions from any number of threads are queued and
+    # committed together: one lock, one journal and one append per table for the whole
+    # batch, however many people submitted in the same instant.
+    def __init__(self, max_batch=MAX_BATCH, batch_ms=BATCH_MS):
+        self.max_batch = max_batch
+        self.batch_seconds = batch_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name='hrf-ingest', daemon=True)
+        self._thread.start()
+
+    def submit(self, tables):
+        # Returns a Future that resolves to {path: rows written} once the batch is on disk
+        future = Future()
+        self._queue.put(({path: list(rows) for path, rows in tables.items()}, future))
+        return future
+
+    def write(self, tables, timeout=None):
+        return self.submit(tables).result(timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        # Nothing may escape: a dead writer thread would leave every write() hanging
+        while True:
+            try:
+                self._commit_batch(self._next_batch())
+            except Exception as e:
+                record_error('ingest', e)
+
+    def _commit_batch(self, batch):
+        # Cancelled submissions are dropped; the rest are marked running and can no
+        # longer be cancelled, so each one is resolved exactly once below
+        batch = [(tables, future) for tables, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        merged = {}
+        for tables, _ in batch:
+            for path, rows in tables.items():
+                merged.setdefault(path, []).extend(rows)
+
+        try:
+            with span('ingest.commit'):
+                commit(merged)
+        except Exception:
+            # The batch was rolled back; commit one by one so a bad submission fails alone
+            for tables, future in batch:
+                try:
+                    result = commit(tables)
+                except Exception as e:
+                    record_error('ingest', e)
+                    future.set_exception(e)
+                else:
+                    incr('ingest.submissions')
+                    future.set_result(result)
+            return
+
+        incr('ingest.batches')
+        incr('ingest.submissions', len(batch))
+        for tables, future in batch:
+            future.set_result({path: len(rows) for path, rows in tables.items()})
+
+
+_writer = None
+_writer_guard = threading.Lock()
+
+
+def get_writer():
+    # Shared per process: module state survives Streamlit re-runs, so every session
+    # of the dashboard submits through the same writer thread
+    global _writer
+    with _writer_guard:
+        if _writer is None:
+            _writer = IngestionWriter()
+        return _writer
+
+
+def _csv_chunks(source, chunk_rows):
+    with open(source, newline='') as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) == chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def bulk_import(sources, chunk_rows=BULK_CHUNK_ROWS):
+    # Backfill: {table path: source CSV}. Sources are streamed chunk by chunk inside one
+    # transaction, so memory stays O(chunk) and the backfill lands completely or not at all.
+    for path, source in sources.items():
+        with open(source, newline='') as f:
+            columns = next(csv.reader(f), [])
+        missing = set(_read_header(path)) - set(columns) - set(DERIVED_COLUMNS)
+        if missing:
+            raise ValueError(f"{source} is missing columns {sorted(missing)} needed by {path}")
+
+    counts = {}
+    with transaction(sources), span('ingest.bulk'):
+        for path, source in sources.items():
+            counts[path] = sum(_append(path, chunk) for chunk in _csv_chunks(source, chunk_rows))
+    _refresh_aggregates(sources)
+    return counts
+
+
+# python -m src.ingestion bulk --beds beds.csv --staff staff.csv --vents vents.csv [--site central]
+if __name__ == '__main__':
+    from src.sites import get_site
+
+    parser = argparse.ArgumentParser(description="Ingestion tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bulk = commands.add_parser('bulk', help="backfill many rows into a site's tables in one transaction")
+    for name in TABLES:
+        bulk.add_argument(f'--{name}', help=f"source CSV to append to {TABLES[name]}")
+    bulk.add_argument('--site', default=None)
+    bulk.add_argument('--chunk-rows', type=int, default=BULK_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    data_dir = get_site(args.site)['data_dir']
+    sources = {os.path.join(data_dir, TABLES[name]): getattr(args, name) for name in TABLES if getattr(args, name)}
+    if not sources:
+        parser.error("nothing to import: pass at least one of " + ', '.join(f'--{name}' for name in TABLES))
+    for path, n in bulk_import(sources, args.chunk_rows).items():
+        print(f"✅ {n} rows -> {path}")
@@ -0,0 +1,198 @@
+# 📁 src/instrumentation.py
+import os
+import json
+import time
+import atexit
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Process-wide timing spans, counters and memory peaks for the load -> preprocess ->
+# predict -> render path.
+#
+#   HRF_TRACE_MEMORY=1     track Python heap peaks per span (tracemalloc, adds overhead)
+#   HRF_METRICS_FILE=path  write a snapshot on exit (.prom -> Prometheus text, else JSON)
+#   HRF_PROFILE=1          run profiled() blocks under cProfile, dumps to HRF_PROFILE_DIR
+TRACE_MEMORY = os.environ.get('HRF_TRACE_MEMORY', '0') == '1'
+METRICS_FILE = os.environ.get('HRF_METRICS_FILE')
+PROFILE = os.environ.get('HRF_PROFILE', '0') == '1'
+PROFILE_DIR = os.environ.get('HRF_PROFILE_DIR', 'profiles')
+
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_local = threading.local()
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def incr(name, n=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def record_error(where, error):
+    # Keeps the existing print-and-continue behaviour, but makes failures countable
+    incr(f"errors.{where}")
+    print(f"[{where} ERROR] {error}")
+
+
+def _record_span(name, seconds, peak_bytes):
+    with _lock:
+        stats = _spans.setdefault(name, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'peak_bytes': 0})
+        stats['count'] += 1
+        stats['total_seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        if peak_bytes is not None:
+            stats['peak_bytes'] = max(stats['peak_bytes'], peak_bytes)
+
+
+@contextmanager
+def span(name):
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # Nested spans share tracemalloc's single peak counter, so each level keeps its
+        # own running peak on a thread-local stack
+        stack = getattr(_local, 'stack', None) or []
+        _local.stack = stack
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        stack.append({'start': current, 'peak': current})
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak_bytes = None
+        if tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            frame = stack.pop()
+            frame_peak = max(frame['peak'], peak)
+            peak_bytes = frame_peak - frame['start']
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], frame_peak)
+        _record_span(name, seconds, peak_bytes)
+
+
+def timed(name):
+    # Decorator form of span()
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(name):
+    # cProfile the block when HRF_PROFILE=1; a no-op otherwise
+    if not PROFILE:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof"))
+
+
+def _max_rss_bytes():
+    try:
+        import resource
+        import sys
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def snapshot():
+    with _lock:
+        spans = {name: {**stats, 'total_seconds': round(stats['total_seconds'], 6),
+                        'max_seconds': round(stats['max_seconds'], 6)}
+                 for name, stats in _spans.items()}
+        counters = dict(_counters)
+    memory = {'max_rss_bytes': _max_rss_bytes()}
+    if tracemalloc.is_tracing():
+        memory['traced_current_bytes'], memory['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+    return {'timestamp': time.time(), 'pid': os.getpid(), 'spans': spans, 'counters': counters, 'memory': memory}
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _metric_name(name):
+    return 'hrf_' + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def to_prometheus(snap=None):
+    snap = snap or snapshot()
+    lines = []
+    for name, stats in sorted(snap['spans'].items()):
+        label = f'{{span="{name}"}}'
+        lines.append(f"hrf_span_count{label} {stats['count']}")
+        lines.append(f"hrf_span_seconds_total{label} {stats['total_seconds']}")
+        lines.append(f"hrf_span_seconds_max{label} {stats['max_seconds']}")
+        if stats['peak_bytes']:
+            lines.append(f"hrf_span_peak_bytes{label} {stats['peak_bytes']}")
+    for name, value in sorted(snap['counters'].items()):
+        lines.append(f"{_metric_name(name)}_total {value}")
+    for name, value in sorted(snap['memory'].items()):
+        if value is not None:
+            lines.append(f"hrf_memory_{name} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def export(path):
+    # .prom / .txt -> Prometheus text exposition format, anything else -> JSON
+    snap = snapshot()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        if path.endswith(('.prom', '.txt')):
+            f.write(to_prometheus(snap))
+        else:
+            json.dump(snap, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body, content_type = json.dumps(snapshot()).encode(), 'application/json'
+        else:
+            body, content_type = to_prometheus().encode(), 'text/plain; version=0.0.4'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port=9464, host='127.0.0.1'):
+    # /metrics (Prometheus text) and /metrics.json from a daemon thread
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if METRICS_FILE:
+    atexit.register(export, METRICS_FILE)
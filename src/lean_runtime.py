@@ -0,0 +1,179 @@
+# 📁 src/lean_runtime.py
+import os
+import sys
+import json
+import glob
+import numpy as np
+from src.cache import file_signature
+
+# Pure-NumPy inference for the Sequential LSTM/Dense models in model/. Weights are
+# exported once from the .keras file to <name>.npz next to it; serving them needs
+# neither TensorFlow nor Keras, which keeps the dashboard's cold start and the
+# per-call overhead of small predicts low.
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0.0, 1.0),
+}
+
+
+def lean_path(model_path):
+    return os.path.splitext(model_path)[0] + '.npz'
+
+
+_freshness = {}
+
+
+def is_fresh(model_path):
+    # The export is only valid for the exact .keras file it was made from
+    path = lean_path(model_path)
+    if not os.path.exists(path) or not os.path.exists(model_path):
+        return False
+    source = list(file_signature(model_path)[1:])
+    key = (file_signature(path), tuple(source))
+    if key not in _freshness:
+        with np.load(path, allow_pickle=False) as npz:
+            spec = json.loads(str(npz['spec']))
+        _freshness[key] = spec.get('source') == source
+    return _freshness[key]
+
+
+def _activation_name(activation):
+    name = activation if isinstance(activation, str) else getattr(activation, '__name__', str(activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation for lean runtime: {name}")
+    return name
+
+
+def export_model(model_path, model=None):
+    # .keras -> .npz (layer spec as JSON + weight arrays)
+    if model is None:
+        from tensorflow.keras.models import load_model
+        model = load_model(model_path, compile=False)
+
+    layers, arrays = [], {}
+    for i, layer in enumerate(model.layers):
+        kind = type(layer).__name__
+        if kind == 'InputLayer':
+            continue
+        cfg = layer.get_config()
+        weights = layer.get_weights()
+        if kind == 'LSTM':
+            layers.append({
+                'type': 'lstm',
+                'units': cfg['units'],
+                'activation': _activation_name(cfg.get('activation', 'tanh')),
+                'recurrent_activation': _activation_name(cfg.get('recurrent_activation', 'sigmoid')),
+                'return_sequences': cfg.get('return_sequences', False),
+            })
+            arrays[f"{i}_kernel"], arrays[f"{i}_recurrent"] = weights[0], weights[1]
+            arrays[f"{i}_bias"] = weights[2] if len(weights) > 2 else np.zeros(weights[0].shape[1], dtype=weights[0].dtype)
+        elif kind == 'Dense':
+            layers.append({'type': 'dense', 'activation': _activation_name(cfg.get('activation', 'linear'))})
+            arrays[f"{i}_kernel"] = weights[0]
+            arrays[f"{i}_bias"] = weights[1] if len(weights) > 1 else np.zeros(weights[0].shape[1], dtype=weights[0].dtype)
+        elif kind == 'Dropout':
+            layers.append({'type': 'dropout', 'rate': cfg.get('rate', 0.0)})
+        else:
+            raise ValueError(f"Unsupported layer for lean runtime: {kind}")
+        layers[-1]['index'] = i
+
+    spec = {'layers': layers, 'source': list(file_signature(model_path)[1:])}
+    path = lean_path(model_path)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, spec=np.array(json.dumps(spec)), **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+class NumpyModel:
+    """Forward pass of an exported Sequential LSTM/Dense model with a Keras-like predict()."""
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as npz:
+            self.spec = json.loads(str(npz['spec']))
+            self.weights = {k: npz[k].astype('float32') for k in npz.files if k != 'spec'}
+        self.path = path
+
+    def _lstm(self, x, layer):
+        i = layer['index']
+        kernel, recurrent, bias = self.weights[f"{i}_kernel"], self.weights[f"{i}_recurrent"], self.weights[f"{i}_bias"]
+        act = ACTIVATIONS[layer['activation']]
+        rec_act = ACTIVATIONS[layer['recurrent_activation']]
+        units = layer['units']
+
+        batch, steps, _ = x.shape
+        h = np.zeros((batch, units), dtype='float32')
+        c = np.zeros((batch, units), dtype='float32')
+        # Input projection for every timestep at once; only the recurrence is sequential
+        projected = x @ kernel + bias
+        outputs = []
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent
+            gate_i = rec_act(z[:, :units])
+            gate_f = rec_act(z[:, units:2 * units])
+            candidate = act(z[:, 2 * units:3 * units])
+            gate_o = rec_act(z[:, 3 * units:])
+            c = gate_f * c + gate_i * candidate
+            h = gate_o * act(c)
+            if layer['return_sequences']:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if layer['return_sequences'] else h
+
+    @property
+    def has_dropout(self):
+        return any(layer['type'] == 'dropout' and layer['rate'] > 0 for layer in self.spec['layers'])
+
+    def predict(self, x, verbose=0, batch_size=None, training=False, rng=None):
+        # training=True keeps dropout active (Keras' model(x, training=True)), so each row
+        # of the batch gets its own mask: one call draws a whole set of MC-dropout samples
+        x = np.asarray(x, dtype='float32')
+        for layer in self.spec['layers']:
+            if layer['type'] == 'lstm':
+                x = self._lstm(x, layer)
+            elif layer['type'] == 'dense':
+                i = layer['index']
+                x = ACTIVATIONS[layer['activation']](x @ self.weights[f"{i}_kernel"] + self.weights[f"{i}_bias"])
+            elif layer['type'] == 'dropout' and training and layer['rate'] > 0:
+                rng = rng if rng is not None else np.random.default_rng()
+                keep = rng.random(x.shape) >= layer['rate']
+                x = np.where(keep, x / (1 - layer['rate']), 0).astype('float32')
+            # otherwise dropout is the identity at inference
+        return x
+
+    __call__ = predict
+
+
+def check_parity(model_path, n_samples=64, seed=0):
+    # Max absolute difference between Keras and the NumPy runtime on random inputs in [0, 1]
+    from tensorflow.keras.models import load_model
+    keras_model = load_model(model_path, compile=False)
+    lean_model = NumpyModel(lean_path(model_path))
+    shape = (n_samples,) + tuple(keras_model.input_shape[1:])
+    x = np.random.default_rng(seed).random(shape, dtype='float32')
+    expected = np.asarray(keras_model.predict(x, verbose=0))
+    return float(np.max(np.abs(expected - lean_model.predict(x))))
+
+
+def export_all(model_dir='model', tolerance=1e-4):
+    # Export every .keras model in model_dir and verify it against Keras
+    results = {}
+    for model_path in sorted(glob.glob(os.path.join(model_dir, '*.keras'))):
+        try:
+            export_model(model_path)
+            diff = check_parity(model_path)
+            results[model_path] = diff
+            print(f"{'✅' if diff <= tolerance else '❌'} {model_path}: max |keras - numpy| = {diff:.2e}")
+        except Exception as e:
+            print(f"[export ERROR] {model_path}: {e}")
+            results[model_path] = None
+    return results
+
+
+if __name__ == '__main__':
+    # python -m src.lean_runtime [model_dir]
+    results = export_all(*sys.argv[1:2])
+    sys.exit(0 if all(d is not None and d <= 1e-4 for d in results.values()) else 1)
@@ -0,0 +1,66 @@
+# 📁 src/model_registry.py
+import os
+import time
+import joblib
+from src.cache import BoundedCache, file_signature
+from src import lean_runtime
+from src.instrumentation import span
+
+# One registry per process: Streamlit re-runs dashboard/app.py on every interaction,
+# but module state survives, so each model is deserialized once and then served warm.
+MAX_CACHED = int(os.environ.get('HRF_MODEL_CACHE_SIZE', 16))
+HASH_CONTENTS = os.environ.get('HRF_REGISTRY_HASH', '0') == '1'
+
+# Inference backend:
+#   auto   NumPy runtime when an up-to-date <model>.npz export exists, Keras otherwise (default)
+#   numpy  NumPy runtime only; a missing or stale export is an error
+#   keras  always load the .keras file with TensorFlow
+BACKEND = os.environ.get('HRF_BACKEND', 'auto')
+
+_models = BoundedCache(MAX_CACHED)
+_scalers = BoundedCache(MAX_CACHED)
+
+
+def _get(cache, path, loader, kind):
+    key = file_signature(path, content_hash=HASH_CONTENTS)
+    obj = cache.get(key)
+    if obj is not None:
+        return obj
+
+    # A new signature for an already-cached path means the file was rewritten (retrain)
+    cache.discard(lambda k: k[0] == key[0])
+
+    start = time.perf_counter()
+    with span(f'load.{kind}'):
+        obj = loader(path)
+    cache.put(key, obj, load_seconds=time.perf_counter() - start)
+    return obj
+
+
+def _load_keras(model_path):
+    # Imported lazily so processes served entirely by the NumPy runtime never load TensorFlow
+    from tensorflow.keras.models import load_model
+    return load_model(model_path, compile=False)
+
+
+def get_model(model_path, backend=None):
+    backend = backend or BACKEND
+    if backend != 'keras':
+        if lean_runtime.is_fresh(model_path):
+            return _get(_models, lean_runtime.lean_path(model_path), lean_runtime.NumpyModel, 'model')
+        if backend == 'numpy':
+            raise FileNotFoundError(f"No up-to-date NumPy export for {model_path}; run 'python -m src.lean_runtime'")
+    return _get(_models, model_path, _load_keras, 'model')
+
+
+def get_scaler(scaler_path):
+    return _get(_scalers, scaler_path, joblib.load, 'scaler')
+
+
+def registry_stats():
+    return {"backend": BACKEND, "models": _models.stats(), "scalers": _scalers.stats()}
+
+
+def clear_registry():
+    _models.clear()
+    _scalers.clear()
@@ -0,0 +1,68 @@
+# 📁 src/precompute.py
+import time
+import argparse
+from src.sites import load_sites
+from src.forecasting import forecast_all
+from src.uncertainty import forecast_intervals_all
+from src import forecast_store
+
+# Background worker: recomputes a site's forecasts (point values plus sampled intervals
+# and shortage probabilities) whenever its data or model files change and materializes
+# them in the forecast store, so the dashboard only reads.
+
+
+def refresh_site(site, horizons=(7, 14, 30), force=False, conn=None):
+    inputs = forecast_store.inputs_version(site)
+    # The longest horizon serves every shorter one, so only it is computed
+    n_days = max(horizons)
+    if not force and forecast_store.latest_run(site['name'], n_days, inputs, conn=conn, with_intervals=True) is not None:
+        return None
+
+    # A current run without intervals (e.g. written by the dashboard) only needs those
+    run_id = None if force else forecast_store.latest_run(site['name'], n_days, inputs, conn=conn)
+    if run_id is None:
+        start = time.perf_counter()
+        df = forecast_all(n_days, site)
+        seconds = time.perf_counter() - start
+        run_id = forecast_store.write_forecast(df, site['name'], inputs, seconds, conn=conn)
+        print(f"✅ {site['name']}: {n_days}-day forecast stored in {seconds:.2f}s")
+
+    try:
+        # Sampled over the run's own horizon, which may be longer than n_days
+        run_days = forecast_store.run_info(run_id, conn)['n_days']
+        start = time.perf_counter()
+        forecast_store.write_intervals(forecast_intervals_all(run_days, site), run_id, conn=conn)
+        print(f"✅ {site['name']}: {run_days}-day intervals stored in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"[precompute ERROR] site '{site['name']}' intervals: {e}")
+    return run_id
+
+
+def run(sites=None, horizons=(7, 14, 30), interval=60, once=False, force=False):
+    sites = sites or load_sites()
+    conn = forecast_store.connect()
+    try:
+        while True:
+            for site in sites:
+                try:
+                    refresh_site(site, horizons, force, conn=conn)
+                except Exception as e:
+                    print(f"[precompute ERROR] site '{site['name']}': {e}")
+            if once:
+                return
+            force = False
+            time.sleep(interval)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Keep the materialized forecast store up to date")
+    parser.add_argument('--once', action='store_true', help="refresh once and exit (for cron)")
+    parser.add_argument('--interval', type=float, default=60, help="seconds between change checks")
+    parser.add_argument('--horizons', default='7,14,30')
+    parser.add_argument('--sites', default=None, help="sites file (default: $HRF_SITES or sites.json)")
+    parser.add_argument('--force', action='store_true', help="recompute even if inputs are unchanged")
+    args = parser.parse_args()
+
+    run(load_sites(args.sites), [int(h) for h in args.horizons.split(',')], args.interval, args.once, args.force)
@@ -1,38 +1,45 @@
 # 📁 src/preprocessing.py
-import pandas as pd
+import os
 from sklearn.preprocessing import MinMaxScaler
-
-def load_and_preprocess_multivariate(file_path, feature_columns):
-    df = pd.read_csv(file_path, parse_dates=['date'])
-
-    # Sort by date for temporal consistency
-    df.sort_values('date', inplace=True)
-
-    lag_days = [1, 3, 7, 14]
-    rolling_windows = [3, 7]
-    extra_features = []
-
-    # Add lag and rolling stats for 'available' features only
-    for col in feature_columns:
-        if 'available' in col:
-            for lag in lag_days:
-                lag_col = f"{col}_lag{lag}"
-                df[lag_col] = df[col].shift(lag)
-                extra_features.append(lag_col)
-
-            for window in rolling_windows:
-                roll_mean = f"{col}_roll_mean{window}"
-                roll_std = f"{col}_roll_std{window}"
-                df[roll_mean] = df[col].rolling(window=window).mean()
-                df[roll_std] = df[col].rolling(window=window).std()
-                extra_features.extend([roll_mean, roll_std])
-
-    df.dropna(inplace=True)
-
-    # Combine original features and newly engineered ones
-    final_features = feature_columns + extra_features
-
-    scaler = MinMaxScaler()
-    scaled = scaler.fit_transform(df[final_features])
+from src.dataset_cache import load_engineered
+from src.model_registry import get_scaler
+from src.instrumentation import span, incr, record_error
+
+
+def load_scaler(scaler_path, final_features):
+    # Scaler persisted by training, or None if it is missing or was fit on other columns
+    if not os.path.exists(scaler_path):
+        incr('preprocess.scaler_refits')
+        print(f"[preprocess WARNING] {scaler_path} not found, fitting a scaler on the data instead")
+        return None
+    try:
+        scaler = get_scaler(scaler_path)  # warm after the first call in this process
+    except Exception as e:
+        record_error('preprocess', e)
+        return None
+
+    names = getattr(scaler, 'feature_names_in_', None)
+    if getattr(scaler, 'n_features_in_', None) != len(final_features) or \
+            (names is not None and list(names) != list(final_features)):
+        incr('preprocess.scaler_refits')
+        print(f"[preprocess WARNING] {scaler_path} does not match the features {final_features}, refitting")
+        return None
+    return scaler
+
+
+def load_and_preprocess_multivariate(file_path, feature_columns, scaler_path=None, last_n=None):
+    # Fit mode (training, scaler_path=None): fit a new scaler on the full history.
+    # Transform mode (inference): reuse the scaler saved with the model and scale only
+    # the trailing last_n rows that the caller actually needs.
+    df, final_features = load_engineered(file_path, feature_columns)
+
+    scaler = load_scaler(scaler_path, final_features) if scaler_path else None
+    if scaler is None:
+        with span('preprocess.scaler_fit'):
+            scaler = MinMaxScaler().fit(df[final_features])
+
+    rows = df[final_features] if last_n is None else df[final_features].iloc[-last_n:]
+    with span('preprocess.transform'):
+        scaled = scaler.transform(rows)
 
     return scaled, scaler, final_features
@@ -0,0 +1,72 @@
+# 📁 src/scenarios.py
+import numpy as np
+import pandas as pd
+from src.preprocessing import load_and_preprocess_multivariate
+from src.forecasting import RESOURCES, FORECAST_START, predict_windows, inverse_target
+from src.sites import site_resources
+
+# A scenario maps a base column to a multiplier applied (in original units) to the
+# last 30-day input window, e.g. {'er_surge_20': {'er_visits_rolling_mean_7': 1.2}}.
+# The multiplier also covers engineered columns derived from it (lags, rolling stats).
+DEFAULT_SCENARIOS = {
+    'baseline': {},
+    'er_surge_20': {'er_visits_rolling_mean_7': 1.2},
+    'er_surge_50': {'er_visits_rolling_mean_7': 1.5},
+    'absenteeism_x2': {'staff_absenteeism_rate': 2.0},
+}
+
+
+def scenario_grid(column, factors, prefix=None):
+    # Sweep one column over many multipliers: {'<prefix>_1.10': {column: 1.1}, ...}
+    prefix = prefix or column
+    return {f"{prefix}_{factor:.2f}": {column: factor} for factor in factors}
+
+
+def _factor_matrix(scenarios, feature_list):
+    factors = np.ones((len(scenarios), len(feature_list)))
+    for i, changes in enumerate(scenarios.values()):
+        for column, factor in changes.items():
+            for j, feature in enumerate(feature_list):
+                if feature == column or feature.startswith(column + '_'):
+                    factors[i, j] = factor
+    return factors
+
+
+def perturbed_windows(window, scaler, feature_list, scenarios):
+    # (30, F) scaled window -> (n_scenarios, 30, F) scaled windows, all built at once
+    raw = scaler.inverse_transform(window)
+    perturbed = raw[None, :, :] * _factor_matrix(scenarios, feature_list)[:, None, :]
+    n_scenarios, lookback, n_features = perturbed.shape
+    scaled = scaler.transform(pd.DataFrame(perturbed.reshape(-1, n_features), columns=feature_list))
+    return scaled.reshape(n_scenarios, lookback, n_features)
+
+
+def run_scenarios(scenarios=None, n_days=7, resources=None, site=None):
+    scenarios = scenarios or DEFAULT_SCENARIOS
+    catalogue = site_resources(site, RESOURCES) if site else RESOURCES
+    resources = resources or list(catalogue)
+    date_index = pd.date_range(start=FORECAST_START, periods=n_days)
+
+    frames = []
+    for name in resources:
+        cfg = catalogue[name]
+        data, scaler, full_feature_list = load_and_preprocess_multivariate(cfg['path'], cfg['features'],
+                                                                           cfg['scaler'], last_n=30)
+        target_index = full_feature_list.index(cfg['target'])
+
+        windows = perturbed_windows(data, scaler, full_feature_list, scenarios)
+        preds = predict_windows(cfg['model'], windows, target_index, n_days)
+        values = inverse_target(scaler, preds, target_index, len(full_feature_list))
+
+        frames.append(pd.DataFrame({
+            'scenario': np.repeat(list(scenarios), n_days),
+            'resource': name,
+            'date': np.tile(date_index, len(scenarios)),
+            'forecast': values.reshape(-1),
+        }))
+
+    return pd.concat(frames, ignore_index=True).set_index(['scenario', 'resource', 'date']).sort_index()
+
+
+if __name__ == '__main__':
+    print(run_scenarios())
@@ -0,0 +1,98 @@
+# 📁 src/scheduler.py
+import os
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from src.sites import load_sites
+
+
+def _init_worker(intra_op, inter_op):
+    # Runs once per worker process, before TensorFlow is imported there, so the
+    # thread pools are sized per worker instead of each grabbing every core.
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(intra_op)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_op)
+    os.environ['OMP_NUM_THREADS'] = str(intra_op)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    # TensorFlow is optional (NumPy runtime / baselines); without it the env limits suffice
+    try:
+        import tensorflow as tf
+    except ImportError:
+        return
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+
+def make_pool(workers, intra_op=1, inter_op=1):
+    # Spawn-based process pool (forking a process that already holds TensorFlow state is
+    # unsafe) whose workers each get intra_op / inter_op threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker, initargs=(intra_op, inter_op))
+
+
+def _forecast_site(site, n_days):
+    from src.forecasting import forecast_all
+    df = forecast_all(n_days, site)
+    df.index.name = 'date'
+    return df.assign(site=site['name']).reset_index()
+
+
+def _train_site(site, horizons, force=False):
+    # Sites are already spread over the pool, so each site trains its models in-process
+    from src.training import train_all
+    return train_all(site, horizons, workers=1, force=force)
+
+
+def _run(task, sites, args, workers, intra_op, inter_op):
+    # Fan `task(site, *args)` out over make_pool(). Returns {site name: result or exception}.
+    workers = workers or min(len(sites), os.cpu_count() or 1)
+    results = {}
+    with make_pool(workers, intra_op, inter_op) as pool:
+        futures = {pool.submit(task, site, *args): site['name'] for site in sites}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"[scheduler ERROR] site '{name}': {e}")
+                results[name] = e
+    return results
+
+
+def forecast_sites(sites=None, n_days=7, workers=None, intra_op=1, inter_op=1):
+    # One consolidated table: (site, date) rows x resource forecast columns
+    sites = sites or load_sites()
+    results = _run(_forecast_site, sites, (n_days,), workers, intra_op, inter_op)
+    frames = [df for df in results.values() if isinstance(df, pd.DataFrame)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).set_index(['site', 'date']).sort_index()
+
+
+def train_sites(sites=None, horizons=None, workers=None, intra_op=1, inter_op=1, force=False):
+    sites = sites or load_sites()
+    return _run(_train_site, sites, (horizons, force), workers, intra_op, inter_op)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run forecasting or training across all sites in parallel")
+    parser.add_argument('command', choices=['forecast', 'train'])
+    parser.add_argument('--sites', default=None, help="sites file (default: $HRF_SITES or sites.json)")
+    parser.add_argument('--only', nargs='*', help="restrict to these site names")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--intra-op', type=int, default=1)
+    parser.add_argument('--inter-op', type=int, default=1)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--output', default=None, help="write the consolidated forecast to this CSV")
+    args = parser.parse_args()
+
+    selected = [s for s in load_sites(args.sites) if not args.only or s['name'] in args.only]
+    if args.command == 'forecast':
+        table = forecast_sites(selected, args.days, args.workers, args.intra_op, args.inter_op)
+        if args.output:
+            table.to_csv(args.output)
+        print(table)
+    else:
+        for name, result in train_sites(selected, None, args.workers, args.intra_op, args.inter_op).items():
+            print(f"{'❌' if isinstance(result, Exception) else '✅'} {name}")
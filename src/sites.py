@@ -0,0 +1,59 @@
+# 📁 src/sites.py
+import os
+import json
+
+# Site registry. sites.json (or the file named by HRF_SITES) lists every hospital:
+#
+#   [{"name": "central", "data_dir": "sites/central/data", "model_dir": "sites/central/model"}, ...]
+#
+# Relative directories are resolved against the sites file. Without a sites file the
+# repo's own data/ and model/ directories form a single "default" site.
+SITES_FILE = os.environ.get('HRF_SITES', 'sites.json')
+DEFAULT_SITE = {'name': 'default', 'data_dir': 'data', 'model_dir': 'model'}
+
+
+def load_sites(path=None):
+    path = path or SITES_FILE
+    if not os.path.exists(path):
+        return [dict(DEFAULT_SITE)]
+
+    with open(path) as f:
+        sites = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(path))
+    resolved = []
+    for site in sites:
+        if 'name' not in site:
+            raise ValueError(f"Site entry without a 'name' in {path}: {site}")
+        site = dict(site)
+        site.setdefault('data_dir', os.path.join('sites', site['name'], 'data'))
+        site.setdefault('model_dir', os.path.join('sites', site['name'], 'model'))
+        for key in ('data_dir', 'model_dir'):
+            if not os.path.isabs(site[key]):
+                site[key] = os.path.join(base, site[key])
+        resolved.append(site)
+    return resolved
+
+
+def get_site(name=None, path=None):
+    sites = load_sites(path)
+    if name is None:
+        return sites[0]
+    for site in sites:
+        if site['name'] == name:
+            return site
+    raise KeyError(f"Unknown site '{name}'")
+
+
+def site_resources(site, resources):
+    # Same resource definitions, with data/model/scaler paths moved into the site's directories
+    site = site or DEFAULT_SITE
+    return {
+        name: {
+            **cfg,
+            'path': os.path.join(site['data_dir'], os.path.basename(cfg['path'])),
+            'model': os.path.join(site['model_dir'], os.path.basename(cfg['model'])),
+            'scaler': os.path.join(site['model_dir'], os.path.basename(cfg['scaler'])),
+        }
+        for name, cfg in resources.items()
+    }
@@ -0,0 +1,293 @@
+# 📁 src/storage.py
+import io
+import os
+import sys
+import glob
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from src.cache import file_signature, read_appended, tail_line
+from src.instrumentation import span, incr
+
+# Typed columnar copies of the source CSVs. The CSV stays the source of truth (the
+# Data Entry tab appends to it). Rows appended to the CSV are added to its copy as a
+# small part (src.ingestion does this on every commit; read_table catches up on
+# appends made elsewhere) and the parts are compacted every MAX_PARTS appends; the
+# copy is only rebuilt from the CSV when the CSV was rewritten rather than appended to.
+#
+#   HRF_STORAGE=csv      always parse the CSV
+#   HRF_STORAGE=parquet  data/.columnar/<table>.parquet (needs pyarrow)
+#   HRF_STORAGE=npy      data/.columnar/<table>/<column>.npy, memory-mapped on read
+#   HRF_STORAGE=auto     parquet if pyarrow is installed, otherwise npy (default)
+BACKEND = os.environ.get('HRF_STORAGE', 'auto')
+COLUMNAR_DIR_NAME = '.columnar'
+MAX_PARTS = 32   # appended parts a copy collects before it is compacted into one
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def resolve_backend(backend=None):
+    backend = backend or BACKEND
+    if backend == 'auto':
+        return 'parquet' if HAS_PYARROW else 'npy'
+    if backend == 'parquet' and not HAS_PYARROW:
+        print("[storage] pyarrow not installed, falling back to npy columns")
+        return 'npy'
+    return backend
+
+
+def read_csv_table(file_path):
+    with span('load.csv'):
+        return pd.read_csv(file_path, parse_dates=['date'])
+
+
+def columnar_path(csv_path, backend):
+    folder, name = os.path.split(os.path.abspath(csv_path))
+    stem = os.path.splitext(name)[0]
+    base = os.path.join(folder, COLUMNAR_DIR_NAME, stem)
+    return base + '.parquet' if backend == 'parquet' else base
+
+
+def _meta_path(path):
+    return os.path.join(path, 'meta.json') if not path.endswith('.parquet') else path[:-len('.parquet')] + '.meta.json'
+
+
+def _source_version(csv_path):
+    # file_signature minus the path, so a copied or moved data directory keeps its copies
+    return list(file_signature(csv_path)[1:])
+
+
+def _read_meta(path):
+    with open(_meta_path(path)) as f:
+        return json.load(f)
+
+
+def _write_meta(path, meta):
+    meta_path = _meta_path(path)
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def _new_meta(df, source, last_line):
+    # Besides the CSV version: its last line, to verify later appends against, the
+    # dtypes appended rows are conformed to, and the appended parts (none yet)
+    return {'rows': len(df), 'source': source, 'last_line': last_line,
+            'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}, 'parts': []}
+
+
+def is_fresh(csv_path, path):
+    meta_path = _meta_path(path)
+    if not os.path.exists(path) or not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return meta.get('source') == _source_version(csv_path)
+
+
+# ---- npy columns -----------------------------------------------------------
+
+def write_npy(df, path, source=None, last_line=''):
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        column = {'name': col, 'file': f"{i}.npy"}
+        if values.dtype == object:
+            # Strings as a fixed-width array; missing cells would become the text 'nan',
+            # so they are recorded in a separate null mask and restored on read
+            missing = df[col].isna().to_numpy()
+            values = df[col].astype(str).to_numpy().astype('U')
+            if missing.any():
+                np.save(os.path.join(tmp_path, f"{i}.null.npy"), missing, allow_pickle=False)
+                column['null'] = f"{i}.null.npy"
+        np.save(os.path.join(tmp_path, column['file']), values, allow_pickle=False)
+        columns.append({**column, 'dtype': str(values.dtype)})
+
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump({**_new_meta(df, source, last_line), 'columns': columns}, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def _read_npy_column(path, column):
+    values = np.load(os.path.join(path, column['file']), mmap_mode='r', allow_pickle=False)
+    if 'null' not in column:
+        return values
+    values = values.astype(object)
+    values[np.load(os.path.join(path, column['null']), allow_pickle=False)] = np.nan
+    return values
+
+
+def _npy_part(path, part):
+    return os.path.join(path, f"part{part}")
+
+
+def read_npy(path):
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    df = pd.DataFrame({c['name']: _read_npy_column(path, c) for c in meta['columns']})
+    masked = {c['name']: meta['dtypes'][c['name']] for c in meta['columns'] if 'null' in c and 'dtypes' in meta}
+    if masked:
+        df = df.astype(masked)  # an all-missing string column would otherwise come back as object
+    parts = [read_npy(_npy_part(path, part)) for part in meta.get('parts', [])]
+    return pd.concat([df] + parts, ignore_index=True) if parts else df
+
+
+# ---- parquet ---------------------------------------------------------------
+
+def _parquet_part(path, part):
+    return f"{path[:-len('.parquet')]}.part{part}.parquet"
+
+
+def write_parquet(df, path, source=None, last_line=''):
+    tmp_path = path + '.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    _write_meta(path, _new_meta(df, source, last_line))
+    for part in glob.glob(_parquet_part(glob.escape(path), '*')):
+        os.remove(part)  # appended parts of the previous copy
+
+
+def read_parquet(path):
+    df = pd.read_parquet(path)
+    parts = _read_meta(path).get('parts', []) if os.path.exists(_meta_path(path)) else []
+    return pd.concat([df] + [pd.read_parquet(_parquet_part(path, p)) for p in parts],
+                     ignore_index=True) if parts else df
+
+
+# ---- appends ---------------------------------------------------------------
+
+def _conform(rows, dtypes):
+    # Rows parsed on their own can infer other dtypes than the whole file would; returns
+    # the rows and the dtypes of copy + rows, or None where only a full parse can tell
+    dtypes = dict(dtypes)
+    for col, dtype in dtypes.items():
+        have = rows[col].dtype
+        if str(have) == dtype:
+            continue
+        if pd.api.types.is_numeric_dtype(have) and not pd.api.types.is_bool_dtype(have) and \
+                dtype.startswith(('int', 'float')):
+            dtypes[col] = 'float64'  # int + float columns concatenate to float, as one parse gives
+        elif rows[col].isna().all() and not dtype.startswith(('int', 'bool')):
+            rows[col] = rows[col].astype(dtype)
+        elif str(have).startswith('datetime64') and dtype.startswith('datetime64'):
+            rows[col] = rows[col].astype(dtype)
+        else:
+            return None
+    return rows, dtypes
+
+
+def extend(csv_path, backend=None):
+    # Add the rows appended to csv_path since its columnar copy was written, as a new
+    # part, instead of converting the whole file again. True if the copy is now fresh;
+    # False if there is no copy or the CSV was rewritten (read_table then rebuilds it).
+    backend = resolve_backend(backend)
+    path = columnar_path(csv_path, backend)
+    if backend == 'csv' or not os.path.exists(path) or not os.path.exists(_meta_path(path)):
+        return False
+    meta = _read_meta(path)
+    source = _source_version(csv_path)  # taken before reading, so a concurrent append leaves it stale
+    if meta.get('source') == source:
+        return True
+    if not meta.get('last_line') or not meta.get('dtypes') or source[1] <= meta['source'][1]:
+        return False
+    appended = read_appended(csv_path, meta['source'][1], meta['last_line'].encode('utf-8'), source[1])
+    if not appended or not appended.endswith(b'\n'):
+        return False
+
+    with span('load.columnar_append'):
+        rows = pd.read_csv(io.BytesIO(appended), header=None, names=list(meta['dtypes']), parse_dates=['date'])
+        conformed = _conform(rows, meta['dtypes'])
+        if conformed is None:
+            return False
+        rows, dtypes = conformed
+
+        last_line = tail_line(csv_path, source[1]).decode('utf-8')
+        if len(meta['parts']) >= MAX_PARTS:
+            # Compact: rewrite copy + parts as one, still without parsing the CSV
+            df = pd.concat([read_parquet(path) if backend == 'parquet' else read_npy(path), rows], ignore_index=True)
+            (write_parquet if backend == 'parquet' else write_npy)(df, path, source, last_line)
+            return True
+
+        part = source[1]  # named by the CSV size it brings the copy to
+        if backend == 'parquet':
+            rows.to_parquet(_parquet_part(path, part), index=False)
+        else:
+            write_npy(rows, _npy_part(path, part))
+        _write_meta(path, {**meta, 'rows': meta['rows'] + len(rows), 'source': source, 'last_line': last_line,
+                           'dtypes': dtypes, 'parts': meta['parts'] + [part]})
+    incr('storage.appended_rows', len(rows))
+    return True
+
+
+# ---- entry points ----------------------------------------------------------
+
+def convert(csv_path, backend=None, df=None, source=None):
+    backend = resolve_backend(backend)
+    if backend == 'csv':
+        return None
+    if df is None:
+        source = _source_version(csv_path)
+        df = read_csv_table(csv_path)
+    last_line = tail_line(csv_path, source[1]).decode('utf-8') if source else ''
+    path = columnar_path(csv_path, backend)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if backend == 'parquet':
+        write_parquet(df, path, source, last_line)
+    else:
+        write_npy(df, path, source, last_line)
+    return path
+
+
+def read_table(path, backend=None):
+    # Drop-in for pd.read_csv(path, parse_dates=['date']) that also accepts a
+    # .parquet file or an npy column directory directly. A copy the CSV has only grown
+    # past is extended with the appended rows rather than rebuilt.
+    if os.path.isdir(path):
+        return read_npy(path)
+    if path.endswith('.parquet'):
+        return read_parquet(path)
+
+    backend = resolve_backend(backend)
+    if backend == 'csv':
+        return read_csv_table(path)
+
+    store = columnar_path(path, backend)
+    try:
+        fresh = extend(path, backend)
+    except Exception as e:
+        print(f"[storage ERROR] could not extend columnar copy of {path}: {e}")
+        fresh = False
+    if fresh:
+        with span(f'load.{backend}'):
+            return read_parquet(store) if backend == 'parquet' else read_npy(store)
+
+    source = _source_version(path)  # taken before reading, so a concurrent append leaves it stale
+    df = read_csv_table(path)
+    try:
+        convert(path, backend, df=df, source=source)
+    except Exception as e:
+        print(f"[storage ERROR] could not write columnar copy of {path}: {e}")
+    return df
+
+
+def convert_all(data_dir='data', backend=None):
+    return [convert(os.path.join(data_dir, name), backend)
+            for name in sorted(os.listdir(data_dir)) if name.endswith('.csv')]
+
+
+if __name__ == '__main__':
+    # python -m src.storage [data_dir] [backend]
+    for converted in convert_all(*sys.argv[1:3]):
+        print(f"✅ {converted}")
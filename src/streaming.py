@@ -0,0 +1,226 @@
+# 📁 src/streaming.py
+import os
+import glob
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+from src.features import add_lag_features, MAX_LOOKBACK
+from src.preprocessing import load_scaler
+from src.cache import file_signature
+from src.storage import COLUMNAR_DIR_NAME
+from src.windowing import n_windows, sliding_windows
+from src.instrumentation import span, incr
+
+# Chunked version of load_and_preprocess_multivariate for histories that don't fit in
+# memory. The CSV is read CHUNK_ROWS rows at a time; each chunk gets its lag/rolling
+# features from the last MAX_LOOKBACK raw rows of the previous one, so the engineered
+# rows, the fitted scaler and the scaled values are the ones the in-memory path
+# produces (rolling statistics up to floating-point rounding), while peak memory is
+# O(chunk) instead of O(history).
+#
+# The in-memory path sorts by date. Each CSV version is first checked for date order
+# in a read-only pass, and streamed as is if it passes (append-only ingestion keeps
+# files that way). One that doesn't (back-dated rows, such as the bundled bed and
+# ventilator tables) is streamed from a date-sorted copy in data/.columnar/, built
+# once per CSV version by an external merge sort: sorted
+# runs of CHUNK_ROWS rows, then a k-way merge that reads each run a slice at a time.
+# Both sorts are stable, so rows with equal dates keep their file order, as in memory.
+CHUNK_ROWS = 100_000
+MERGE_FANIN = 64   # runs merged at once; more runs are merged in several rounds
+
+
+def _sort_keys(dates):
+    # int64 nanoseconds with NaT last, where sort_values(na_position='last') puts them
+    keys = dates.to_numpy(dtype='datetime64[ns]').view('int64').copy()
+    keys[pd.isna(dates).to_numpy()] = np.iinfo('int64').max
+    return keys
+
+
+def _in_date_order(file_path, chunk_rows):
+    # Read-only check, stopping at the first back-dated row; append-only files pass
+    last_key = None
+    for chunk in pd.read_csv(file_path, parse_dates=['date'], chunksize=chunk_rows):
+        keys = _sort_keys(chunk['date'])
+        if len(keys):
+            if (np.diff(keys) < 0).any() or (last_key is not None and keys[0] < last_key):
+                return False
+            last_key = keys[-1]
+    return True
+
+
+def _sorted_runs(file_path, chunk_rows, run_dir):
+    # Merge sort pass 1: every chunk stably sorted into its own CSV run
+    runs = []
+    for chunk in pd.read_csv(file_path, parse_dates=['date'], chunksize=chunk_rows):
+        path = os.path.join(run_dir, f"run{len(runs)}.csv")
+        chunk.iloc[np.argsort(_sort_keys(chunk['date']), kind='stable')].to_csv(path, index=False)
+        runs.append(path)
+    return runs
+
+
+def _merge_runs(runs, out_path, chunk_rows):
+    # Merge sort pass 2: k-way merge holding at most chunk_rows // k rows of each run.
+    # Rows are ordered by (date, run, position); everything up to the smallest last key
+    # among the buffers can be written, since no unread row sorts before it.
+    readers = [pd.read_csv(path, parse_dates=['date'], chunksize=max(1, chunk_rows // len(runs))) for path in runs]
+    try:
+        buffers = [next(reader, None) for reader in readers]
+        header = True
+        with open(out_path, 'w', newline='') as f:
+            while any(b is not None for b in buffers):
+                live = [i for i, b in enumerate(buffers) if b is not None]
+                keys = {i: _sort_keys(buffers[i]['date']) for i in live}
+                cut_run = min(live, key=lambda i: (keys[i][-1], i))
+                cut_key = keys[cut_run][-1]
+
+                pieces = []
+                for i in live:
+                    n = len(keys[i]) if i == cut_run else \
+                        int(np.searchsorted(keys[i], cut_key, side='right' if i < cut_run else 'left'))
+                    pieces.append(buffers[i].iloc[:n])
+                    buffers[i] = buffers[i].iloc[n:] if n < len(keys[i]) else next(readers[i], None)
+
+                merged = pd.concat(pieces, ignore_index=True)
+                merged.iloc[np.argsort(_sort_keys(merged['date']), kind='stable')].to_csv(f, header=header, index=False)
+                header = False
+    finally:
+        for reader in readers:
+            reader.close()
+
+
+def sorted_source(file_path, chunk_rows=CHUNK_ROWS):
+    # file_path itself if it is in date order, else its date-sorted copy. Both outcomes
+    # are recorded under the CSV's size/mtime, so a CSV is only checked once per version.
+    folder, name = os.path.split(os.path.abspath(file_path))
+    stem = os.path.splitext(name)[0]
+    _, mtime_ns, size = file_signature(file_path)  # taken before reading, so a concurrent append leaves it stale
+    base = os.path.join(folder, COLUMNAR_DIR_NAME, f"{stem}.{size}-{mtime_ns}")
+    if os.path.exists(base + '.in_order'):
+        return file_path
+    if os.path.exists(base + '.sorted.csv'):
+        return base + '.sorted.csv'
+
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    with span('streaming.order_check'):
+        in_order = _in_date_order(file_path, chunk_rows)
+    if in_order:
+        target = base + '.in_order'
+        open(target, 'w').close()
+    else:
+        target = base + '.sorted.csv'
+        run_dir = tempfile.mkdtemp(prefix=f"{stem}.", dir=os.path.dirname(base))
+        try:
+            with span('streaming.sort'):
+                runs = _sorted_runs(file_path, chunk_rows, run_dir)
+                while len(runs) > 1:
+                    # Consecutive runs merged in groups, so (run, position) order is kept
+                    merged = []
+                    for i in range(0, len(runs), MERGE_FANIN):
+                        merged.append(os.path.join(run_dir, f"merge{len(merged)}.{len(runs)}.csv"))
+                        _merge_runs(runs[i:i + MERGE_FANIN], merged[-1], chunk_rows)
+                    runs = merged
+                os.replace(runs[0], target)
+            incr('streaming.sorted_copies')
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    # Copies of older versions of this CSV are no longer needed
+    for old in glob.glob(os.path.join(glob.escape(os.path.dirname(base)), f"{glob.escape(stem)}.*-*.*")):
+        if not old.startswith(base + '.'):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return file_path if in_order else target
+
+
+def _raw_chunks(file_path, chunk_rows):
+    yield from pd.read_csv(sorted_source(file_path, chunk_rows), parse_dates=['date'], chunksize=chunk_rows)
+
+
+def engineered_chunks(file_path, feature_columns, chunk_rows=CHUNK_ROWS):
+    # Yields (engineered rows, final feature list) per chunk, NaN rows dropped as in-memory
+    tail = None
+    for chunk in _raw_chunks(file_path, chunk_rows):
+        combined = chunk if tail is None else pd.concat([tail, chunk], ignore_index=True)
+        with span('streaming.features'):
+            df, extra_features = add_lag_features(combined.copy(), feature_columns)
+        block = df.iloc[0 if tail is None else len(tail):].dropna()
+        tail = combined.iloc[-MAX_LOOKBACK:]
+        incr('streaming.rows', len(chunk))
+        yield block, list(feature_columns) + extra_features
+
+
+def fit_scaler(file_path, feature_columns, chunk_rows=CHUNK_ROWS):
+    # First pass: MinMaxScaler.partial_fit over every chunk -> (scaler, final features, rows)
+    scaler, final_features, n_rows = MinMaxScaler(), None, 0
+    with span('streaming.scaler_fit'):
+        for block, final_features in engineered_chunks(file_path, feature_columns, chunk_rows):
+            if len(block):
+                scaler.partial_fit(block[final_features])
+                n_rows += len(block)
+    if n_rows == 0:
+        raise ValueError(f"{file_path} has no usable rows")
+    return scaler, final_features, n_rows
+
+
+def scaled_blocks(file_path, feature_columns, scaler, chunk_rows=CHUNK_ROWS):
+    # Second pass (or the only one, with a persisted scaler): scaled (rows, features) arrays
+    for block, final_features in engineered_chunks(file_path, feature_columns, chunk_rows):
+        if len(block):
+            with span('streaming.transform'):
+                yield scaler.transform(block[final_features])
+
+
+def stream_preprocessed(file_path, feature_columns, scaler_path=None, chunk_rows=CHUNK_ROWS):
+    # Streaming counterpart of load_and_preprocess_multivariate: returns
+    # (generator of scaled blocks, scaler, final features, usable rows). A first pass
+    # counts the rows and fits a scaler, which is replaced by the one saved at
+    # scaler_path when that matches; the blocks stream in a second pass.
+    scaler, final_features, n_rows = fit_scaler(file_path, feature_columns, chunk_rows)
+    saved = load_scaler(scaler_path, final_features) if scaler_path else None
+    scaler = saved or scaler
+    return scaled_blocks(file_path, feature_columns, scaler, chunk_rows), scaler, final_features, n_rows
+
+
+def stream_windows(blocks, lookback=30, horizon=1, target_index=0, batch_size=1024, start=0, stop=None):
+    # (X, y) batches for windows start..stop of the concatenated blocks, in order, holding
+    # only one block plus the lookback + horizon - 1 rows carried over from the previous one
+    carry, offset = None, 0   # offset = global index of the first window starting in `carry`
+    for block in blocks:
+        buffer = block if carry is None else np.concatenate([carry, block])
+        count = n_windows(len(buffer), lookback, horizon)
+        if count:
+            X, y = sliding_windows(buffer, lookback, horizon, target_index)
+            first, last = max(start - offset, 0), count if stop is None else min(stop - offset, count)
+            for i in range(first, last, batch_size):
+                j = min(i + batch_size, last)
+                yield np.ascontiguousarray(X[i:j], dtype='float32'), np.ascontiguousarray(y[i:j], dtype='float32')
+        carry = buffer[count:]
+        offset += count
+        if stop is not None and offset >= stop:
+            return
+
+
+def make_streaming_dataset(file_path, feature_columns, scaler, target_index, lookback=30, horizon=1,
+                           batch_size=16, start=0, stop=None, shuffle=False, shuffle_buffer=10_000,
+                           chunk_rows=CHUNK_ROWS, seed=None):
+    # tf.data pipeline over stream_windows; the file is re-streamed every epoch, and
+    # shuffling happens within a bounded buffer instead of over the whole history
+    import tensorflow as tf
+
+    n_features = int(scaler.n_features_in_)
+
+    def generate():
+        yield from stream_windows(scaled_blocks(file_path, feature_columns, scaler, chunk_rows),
+                                  lookback, horizon, target_index, 1024, start, stop)
+
+    ds = tf.data.Dataset.from_generator(generate, output_signature=(
+        tf.TensorSpec((None, lookback, n_features), tf.float32),
+        tf.TensorSpec((None, horizon), tf.float32),
+    )).unbatch()
+    if shuffle:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
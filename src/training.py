@@ -0,0 +1,222 @@
+# 📁 src/training.py
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import as_completed
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
+from tensorflow.keras.callbacks import EarlyStopping, BackupAndRestore
+from tensorflow.keras.losses import MeanSquaredError
+import joblib
+from src.preprocessing import load_and_preprocess_multivariate
+from src.forecasting import RESOURCES
+from src.sites import site_resources
+from src.windowing import n_windows, make_dataset
+from src.streaming import fit_scaler as fit_scaler_streaming, make_streaming_dataset
+from src.lean_runtime import export_model
+from src.scheduler import make_pool
+
+# Direct multi-horizon models to train alongside the single-step ones. Off by default;
+# opt in with e.g. HRF_DIRECT_HORIZONS="7,14,30" or train_models.py --horizons 7,14,30
+DIRECT_HORIZONS = [int(h) for h in os.environ.get('HRF_DIRECT_HORIZONS', '').split(',') if h.strip()]
+
+# Everything besides the data that determines a trained model; part of the job hash
+HYPERPARAMS = {
+    'lookback': 30,
+    'units': 64,
+    'epochs': 100,
+    'batch_size': 16,
+    'patience': 10,
+    'validation_split': 0.2,
+}
+
+MANIFEST_NAME = 'training_manifest.json'
+CHECKPOINT_DIR_NAME = '.checkpoints'
+
+
+def build_and_train(file_path, target_column, base_features, model_name, horizon=1, model_dir='model',
+                    hyperparams=None, checkpoint_dir=None, streaming=False):
+    print(f"\n📊 Training model for: {target_column} (horizon={horizon})")
+    os.makedirs(model_dir, exist_ok=True)
+    hp = {**HYPERPARAMS, **(hyperparams or {})}
+    lookback = hp['lookback']
+
+    if streaming:
+        # Histories larger than memory: the scaler is fit in one chunked pass and the
+        # windows are streamed from the CSV every epoch (src.streaming)
+        scaler, full_feature_list, n_rows = fit_scaler_streaming(file_path, base_features)
+    else:
+        # Load preprocessed scaled data
+        scaled_data, scaler, full_feature_list = load_and_preprocess_multivariate(file_path, base_features)
+        n_rows = len(scaled_data)
+
+    print(f"ℹ️ Total features used: {len(full_feature_list)} — {full_feature_list}")
+
+    # Windows are gathered lazily from the scaled array (no (N, lookback, F) copy);
+    # the last validation_split of windows is held out, as Keras' validation_split does
+    target_index = full_feature_list.index(target_column)
+    n_samples = n_windows(n_rows, lookback, horizon)
+    n_train = int(n_samples * (1 - hp['validation_split']))
+    if streaming:
+        train_ds = make_streaming_dataset(file_path, base_features, scaler, target_index, lookback, horizon,
+                                          hp['batch_size'], stop=n_train, shuffle=True)
+        val_ds = make_streaming_dataset(file_path, base_features, scaler, target_index, lookback, horizon,
+                                        hp['batch_size'], start=n_train, stop=n_samples)
+    else:
+        train_ds = make_dataset(scaled_data, lookback, horizon, target_index, hp['batch_size'], stop=n_train, shuffle=True)
+        val_ds = make_dataset(scaled_data, lookback, horizon, target_index, hp['batch_size'], start=n_train, stop=n_samples)
+
+    # Define LSTM model (one output per horizon step for direct multi-horizon models).
+    # An optional 'dropout' hyperparameter adds a Dropout layer before the output, which
+    # src.uncertainty samples for MC-dropout intervals; it is left out of HYPERPARAMS so
+    # existing job hashes (and trained models) stay valid.
+    layers = [Input(shape=(lookback, len(full_feature_list))), LSTM(hp['units'])]
+    if hp.get('dropout'):
+        layers.append(Dropout(hp['dropout']))
+    model = Sequential(layers + [Dense(horizon)])
+    model.compile(optimizer='adam', loss=MeanSquaredError())
+
+    # Train model; with a checkpoint_dir a killed run resumes from its last finished epoch
+    callbacks = [EarlyStopping(patience=hp['patience'], restore_best_weights=True)]
+    if checkpoint_dir:
+        callbacks.append(BackupAndRestore(backup_dir=checkpoint_dir))
+    history = model.fit(train_ds, epochs=hp['epochs'], validation_data=val_ds, callbacks=callbacks, verbose=1)
+
+    # Save model and scaler; direct models sit next to the single-step one as <name>_h<N>
+    if horizon > 1:
+        model_name = f"{model_name}_h{horizon}"
+    model_path = os.path.join(model_dir, f"{model_name}.keras")
+    model.save(model_path)
+    joblib.dump(scaler, os.path.join(model_dir, f"{model_name}_scaler.save"))
+    export_model(model_path, model)  # NumPy runtime copy for TensorFlow-free inference
+    print(f"✅ Saved model as {model_path}")
+
+    losses = history.history.get('loss', [])
+    val_losses = history.history.get('val_loss', [])
+    return {
+        'model_path': model_path,
+        'epochs': len(losses),
+        'loss': float(min(losses)) if losses else None,
+        'val_loss': float(min(val_losses)) if val_losses else None,
+        'samples': int(n_samples),
+    }
+
+
+def model_name_for(cfg):
+    return os.path.splitext(os.path.basename(cfg['model']))[0]
+
+
+def job_hash(job):
+    # Content hash of a training job: input data bytes + features/target/horizon + hyperparameters
+    digest = hashlib.sha256()
+    with open(job['path'], 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    spec = {k: job[k] for k in ('target', 'features', 'horizon', 'hyperparams')}
+    digest.update(json.dumps(spec, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_manifest(model_dir):
+    path = os.path.join(model_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(model_dir, manifest):
+    path = os.path.join(model_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def training_jobs(site=None, horizons=None, hyperparams=None, streaming=False):
+    # Single-step model plus direct multi-horizon models for every resource of one site
+    resources = site_resources(site, RESOURCES) if site else RESOURCES
+    model_dir = site['model_dir'] if site else 'model'
+    horizons = DIRECT_HORIZONS if horizons is None else horizons
+    hp = {**HYPERPARAMS, **(hyperparams or {})}
+
+    jobs = []
+    for cfg in resources.values():
+        for horizon in [1] + [h for h in horizons if h > 1]:
+            name = model_name_for(cfg) + (f"_h{horizon}" if horizon > 1 else '')
+            jobs.append({
+                'key': name,
+                'path': cfg['path'],
+                'target': cfg['target'],
+                'features': cfg['features'],
+                'model_name': model_name_for(cfg),
+                'horizon': horizon,
+                'hyperparams': hp,
+                'model_dir': model_dir,
+                'streaming': streaming,  # how the data is read, not part of the job hash
+            })
+    return jobs
+
+
+def _run_job(job):
+    start = time.time()
+    checkpoint_dir = os.path.join(job['model_dir'], CHECKPOINT_DIR_NAME, f"{job['key']}-{job['hash'][:12]}")
+    metrics = build_and_train(job['path'], job['target'], job['features'], job['model_name'],
+                              horizon=job['horizon'], model_dir=job['model_dir'],
+                              hyperparams=job['hyperparams'], checkpoint_dir=checkpoint_dir,
+                              streaming=job.get('streaming', False))
+    return {'seconds': round(time.time() - start, 2), **metrics}
+
+
+def train_all(site=None, horizons=None, workers=None, force=False, hyperparams=None,
+              intra_op=1, inter_op=1, streaming=False):
+    # Train every model of a site; jobs whose data + settings hash matches the manifest
+    # (and whose model file still exists) are skipped, the rest run in parallel processes.
+    # A failed job is recorded in the manifest without stopping the others.
+    jobs = training_jobs(site, horizons, hyperparams, streaming)
+    model_dir = jobs[0]['model_dir'] if jobs else 'model'
+    os.makedirs(model_dir, exist_ok=True)
+    manifest = load_manifest(model_dir)
+
+    pending = []
+    for job in jobs:
+        job['hash'] = job_hash(job)
+        previous = manifest.get(job['key'], {})
+        model_exists = os.path.exists(os.path.join(model_dir, f"{job['key']}.keras"))
+        if not force and previous.get('status') == 'ok' and previous.get('hash') == job['hash'] and model_exists:
+            print(f"⏭️ {job['key']} unchanged, skipping")
+            continue
+        pending.append(job)
+
+    def record(job, result=None, error=None):
+        manifest[job['key']] = {
+            'hash': job['hash'],
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'horizon': job['horizon'],
+            'target': job['target'],
+            'status': 'failed' if error else 'ok',
+            **({'error': str(error)} if error else result),
+        }
+        _save_manifest(model_dir, manifest)
+
+    workers = workers or min(len(pending), os.cpu_count() or 1)
+    if workers <= 1:
+        for job in pending:
+            try:
+                record(job, _run_job(job))
+            except Exception as e:
+                print(f"[train_all ERROR] {job['key']}: {e}")
+                record(job, error=e)
+    elif pending:
+        with make_pool(workers, intra_op, inter_op) as pool:
+            futures = {pool.submit(_run_job, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    record(job, future.result())
+                except Exception as e:
+                    print(f"[train_all ERROR] {job['key']}: {e}")
+                    record(job, error=e)
+
+    return manifest
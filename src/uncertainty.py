@@ -0,0 +1,178 @@
+# 📁 src/uncertainty.py
+import os
+import numpy as np
+import pandas as pd
+from src.cache import BoundedCache, file_signature
+from src.preprocessing import load_and_preprocess_multivariate
+from src.model_registry import get_model
+from src.forecasting import (RESOURCES, FORECAST_START, LOOKBACK, FALLBACK_BASELINE, find_direct_model,
+                             inverse_target, forecaster_for)
+from src.baselines import METHODS as BASELINE_METHODS, target_history
+from src.sites import site_resources
+from src.windowing import sliding_windows
+from src.instrumentation import span, incr
+
+# Probabilistic forecasts: N_SAMPLES sample paths per resource, drawn as one batch.
+#
+#   - Residual bootstrap: every path gets in-sample errors of the same model resampled
+#     onto its predictions. Autoregressive models add a one-step error at each step and
+#     carry it forward; direct models add a whole error row, so the horizons stay
+#     correlated.
+#   - MC-dropout: models trained with a dropout rate (train_models.py --dropout) also
+#     keep dropout active while sampling, so each path sees a different network.
+#
+# All paths go through the same predict call: one call per step for autoregressive
+# models and a single call for direct ones, not one call per sample. Baseline
+# forecasters get a random-walk bootstrap of the day-to-day changes instead.
+#
+# The residuals are in-sample (the models were fit on this history), so the intervals
+# are on the narrow side.
+N_SAMPLES = int(os.environ.get('HRF_MC_SAMPLES', 200))
+QUANTILES = (0.05, 0.5, 0.95)
+RESIDUAL_WINDOWS = 365
+SHORTAGE_QUANTILE = 0.1   # default threshold: the target's 10th percentile over the last year
+ALERT_PROBABILITY = 0.2
+
+_residuals = BoundedCache(maxsize=32)
+
+
+def has_dropout(model):
+    if hasattr(model, 'has_dropout'):
+        return model.has_dropout
+    return any(type(layer).__name__ == 'Dropout' and getattr(layer, 'rate', 0) > 0 for layer in model.layers)
+
+
+def _predict(model, x, mc, rng):
+    if not mc:
+        return np.asarray(model.predict(x, verbose=0))
+    if hasattr(model, 'has_dropout'):
+        return model.predict(x, training=True, rng=rng)
+    return np.asarray(model(x, training=True))  # Keras: dropout active for this call
+
+
+def model_residuals(cfg, model_path, horizon=1):
+    # (n_windows, horizon) in-sample errors in scaled units over the last RESIDUAL_WINDOWS
+    # windows, from one batched predict; cached per model file and data version
+    key = (file_signature(model_path), file_signature(cfg['path']), cfg['scaler'], horizon)
+    residuals = _residuals.get(key)
+    if residuals is None:
+        with span('uncertainty.residuals'):
+            data, _, features = load_and_preprocess_multivariate(cfg['path'], cfg['features'], cfg['scaler'])
+            X, y = sliding_windows(data, LOOKBACK, horizon, features.index(cfg['target']))
+            X, y = X[-RESIDUAL_WINDOWS:], np.asarray(y[-RESIDUAL_WINDOWS:])
+            preds = np.asarray(get_model(model_path).predict(np.ascontiguousarray(X, dtype='float32'), verbose=0))
+            residuals = (y - preds[:, :horizon]).astype('float32')
+        _residuals.discard(lambda k: k[0][0] == key[0][0] and k[3] == horizon)
+        _residuals.put(key, residuals)
+    return residuals
+
+
+def sample_paths(cfg, window, target_index, n_days, n_samples=N_SAMPLES, rng=None):
+    # (n_samples, n_days) scaled sample paths from the last window
+    rng = rng if rng is not None else np.random.default_rng()
+    x = np.repeat(np.asarray(window, dtype='float32')[None], n_samples, axis=0)
+
+    direct_path = find_direct_model(cfg['model'], n_days)
+    if direct_path:
+        model = get_model(direct_path)
+        horizon = int(os.path.splitext(direct_path)[0].rsplit('_h', 1)[1])
+        residuals = model_residuals(cfg, direct_path, horizon)
+        incr('predict.windows', n_samples)
+        with span('predict.direct'):
+            preds = _predict(model, x, has_dropout(model), rng)[:, :n_days]
+        return preds + residuals[rng.integers(len(residuals), size=n_samples), :n_days]
+
+    model = get_model(cfg['model'])
+    mc = has_dropout(model)
+    residuals = model_residuals(cfg, cfg['model'])[:, 0]
+    paths = np.empty((n_samples, n_days), dtype='float32')
+    for step in range(n_days):
+        incr('predict.windows', n_samples)
+        with span('predict.step'):
+            pred = _predict(model, x, mc, rng)[:, 0] + residuals[rng.integers(len(residuals), size=n_samples)]
+        paths[:, step] = pred
+
+        # Every path carries its own sampled value forward
+        next_row = x[:, -1].copy()
+        next_row[:, target_index] = pred
+        x = np.concatenate([x[:, 1:], next_row[:, None, :]], axis=1)
+    return paths
+
+
+def baseline_paths(cfg, n_days, method, n_samples=N_SAMPLES, rng=None):
+    # Point forecast of a baseline plus bootstrapped day-to-day changes, accumulated
+    rng = rng if rng is not None else np.random.default_rng()
+    history = target_history(cfg['path'], cfg['target'], cfg['features'])
+    point = BASELINE_METHODS[method](history[None, :], n_days)[0]
+    changes = np.diff(history)
+    if len(changes) == 0:
+        return np.repeat(point[None], n_samples, axis=0)
+    return point + np.cumsum(changes[rng.integers(len(changes), size=(n_samples, n_days))], axis=1)
+
+
+def forecast_samples(name, n_days=7, resources=None, n_samples=N_SAMPLES, seed=0, method=None):
+    # (n_samples, n_days) sample paths in original units
+    cfg = (resources or RESOURCES)[name]
+    rng = np.random.default_rng(seed)
+    method = method or forecaster_for(name, cfg)
+    if method not in BASELINE_METHODS:
+        try:
+            data, scaler, features = load_and_preprocess_multivariate(cfg['path'], cfg['features'],
+                                                                      cfg['scaler'], last_n=LOOKBACK)
+            if len(data) < LOOKBACK:
+                raise ValueError(f"{cfg['path']} has {len(data)} usable rows, the LSTM needs {LOOKBACK}")
+            target_index = features.index(cfg['target'])
+            paths = sample_paths(cfg, data, target_index, n_days, n_samples, rng)
+            return inverse_target(scaler, paths, target_index, len(features))
+        except Exception as e:
+            incr('forecast.fallbacks')
+            print(f"[uncertainty WARNING] {name}: LSTM unavailable ({e}), using '{FALLBACK_BASELINE}' baseline")
+            method = FALLBACK_BASELINE
+    return baseline_paths(cfg, n_days, method, n_samples, rng)
+
+
+def shortage_threshold(name, resources=None):
+    # Per-resource 'shortage_threshold' if configured, else the 10th percentile of the last
+    # year (NaN without any history: no day is then flagged)
+    cfg = (resources or RESOURCES)[name]
+    if 'shortage_threshold' in cfg:
+        return float(cfg['shortage_threshold'])
+    history = target_history(cfg['path'], cfg['target'], cfg['features'])
+    return float(np.quantile(history, SHORTAGE_QUANTILE)) if len(history) else float('nan')
+
+
+def forecast_intervals(name, n_days=7, resources=None, threshold=None, quantiles=QUANTILES,
+                       n_samples=N_SAMPLES, seed=0, method=None):
+    # Per day: mean, quantiles and P(value < threshold)
+    samples = forecast_samples(name, n_days, resources, n_samples, seed, method)
+    threshold = shortage_threshold(name, resources) if threshold is None else threshold
+    table = pd.DataFrame({'mean': samples.mean(axis=0)},
+                         index=pd.date_range(start=FORECAST_START, periods=n_days, name='date'))
+    for q, values in zip(quantiles, np.quantile(samples, quantiles, axis=0)):
+        table[f"q{round(q * 100):02d}"] = values
+    table['threshold'] = threshold
+    table['p_shortage'] = (samples < threshold).mean(axis=0)
+    return table
+
+
+def forecast_intervals_all(n_days=7, site=None, thresholds=None, n_samples=N_SAMPLES, seed=0, method=None):
+    # Long table indexed by (resource, date) for every resource of a site
+    resources = site_resources(site, RESOURCES) if site else RESOURCES
+    thresholds = thresholds or {}
+    with span('forecast_intervals'):
+        frames = {name: forecast_intervals(name, n_days, resources, thresholds.get(name), QUANTILES,
+                                           n_samples, seed, method)
+                  for name in resources}
+    return pd.concat(frames, names=['resource'])
+
+
+def shortage_alerts(n_days=7, site=None, thresholds=None, min_probability=ALERT_PROBABILITY, intervals=None):
+    # Days on which a resource falls below its threshold with at least min_probability,
+    # most likely first; pass `intervals` to reuse a forecast_intervals_all() result
+    intervals = forecast_intervals_all(n_days, site, thresholds) if intervals is None else intervals
+    alerts = intervals[intervals['p_shortage'] >= min_probability].reset_index()
+    return alerts.sort_values(['p_shortage', 'date'], ascending=[False, True]).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    print(shortage_alerts(min_probability=0.0).to_string(index=False))
@@ -0,0 +1,62 @@
+# 📁 src/windowing.py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def n_windows(n_rows, lookback=30, horizon=1):
+    return max(0, n_rows - lookback - horizon + 1)
+
+
+def sliding_windows(data, lookback=30, horizon=1, target_index=None):
+    # Zero-copy strided views over `data` (rows x features):
+    #   X[i] = data[i : i+lookback]                          -> (N, lookback, F)
+    #   y[i] = data[i+lookback : i+lookback+horizon, target] -> (N, horizon)
+    # Both share memory with `data`; copy a slice (np.ascontiguousarray) before mutating it.
+    data = np.asarray(data)
+    n = n_windows(len(data), lookback, horizon)
+    X = sliding_window_view(data, lookback, axis=0)[:n].transpose(0, 2, 1)
+    if target_index is None:
+        return X
+    y = sliding_window_view(data[lookback:, target_index], horizon)[:n]
+    return X, y
+
+
+def window_batches(data, lookback=30, horizon=1, target_index=None, batch_size=256, start=0, stop=None):
+    # Materializes one batch of windows at a time, so peak memory is batch_size windows
+    # rather than every window of the history
+    views = sliding_windows(data, lookback, horizon, target_index)
+    X = views[0] if target_index is not None else views
+    stop = len(X) if stop is None else min(stop, len(X))
+    for i in range(start, stop, batch_size):
+        j = min(i + batch_size, stop)
+        if target_index is None:
+            yield np.ascontiguousarray(X[i:j])
+        else:
+            yield np.ascontiguousarray(X[i:j]), np.ascontiguousarray(views[1][i:j])
+
+
+def make_dataset(data, lookback=30, horizon=1, target_index=0, batch_size=16, start=0, stop=None,
+                 shuffle=False, seed=None):
+    # tf.data pipeline that gathers windows lazily from a single copy of `data` on the fly
+    import tensorflow as tf
+
+    stop = n_windows(len(data), lookback, horizon) if stop is None else stop
+    series = tf.constant(np.asarray(data), dtype=tf.float32)
+    offsets = tf.range(lookback, dtype=tf.int64)
+    target_offsets = tf.range(horizon, dtype=tf.int64) + lookback
+
+    def gather(idx):
+        X = tf.gather(series, idx[:, None] + offsets)
+        y = tf.gather(series[:, target_index], idx[:, None] + target_offsets)
+        return X, y
+
+    ds = tf.data.Dataset.range(start, stop)
+    if shuffle:
+        ds = ds.shuffle(stop - start, seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+
+def predict_in_batches(model, data, lookback=30, batch_size=1024):
+    # One prediction per window without materializing all windows at once
+    outputs = [np.asarray(model.predict(X, verbose=0)) for X in window_batches(data, lookback, batch_size=batch_size)]
+    return np.concatenate(outputs) if outputs else np.empty((0, 1))
@@ -1,84 +1,26 @@
-# 📁 train_models.py 
-import os
-import numpy as np
-import pandas as pd
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Input
-from tensorflow.keras.callbacks import EarlyStopping
-from tensorflow.keras.losses import MeanSquaredError
-from sklearn.preprocessing import MinMaxScaler
-import joblib
-from src.preprocessing import load_and_preprocess_multivariate
-
-# Create model directory if it doesn't exist
-os.makedirs('model', exist_ok=True)
-
-def build_and_train(file_path, target_column, base_features, model_name):
-    print(f"\n📊 Training model for: {target_column}")
-
-    # Load preprocessed scaled data
-    scaled_data, scaler, full_feature_list = load_and_preprocess_multivariate(file_path, base_features)
-
-    print(f"ℹ️ Total features used: {len(full_feature_list)} — {full_feature_list}")
-
-    # Prepare sequences
-    X, y = [], []
-    for i in range(30, len(scaled_data)):
-        X.append(scaled_data[i-30:i])
-        y.append(scaled_data[i, full_feature_list.index(target_column)])
-    X, y = np.array(X), np.array(y)
-
-    # Define LSTM model
-    model = Sequential([
-        Input(shape=(30, X.shape[2])),
-        LSTM(64),
-        Dense(1)
-    ])
-    model.compile(optimizer='adam', loss=MeanSquaredError())
-
-    # Train model
-    es = EarlyStopping(patience=10, restore_best_weights=True)
-    model.fit(X, y, epochs=100, batch_size=16, validation_split=0.2, callbacks=[es], verbose=1)
-
-    # Save model and scaler
-    model.save(f"model/{model_name}.keras")
-    joblib.dump(scaler, f"model/{model_name}_scaler.save")
-    print(f"✅ Saved model as model/{model_name}.keras")
-
-# 🚑 Hospital Bed Models
-build_and_train(
-    'data/hospital_bed_data_enhanced.csv',
-    'icu_available',
-    ['icu_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'],
-    'icu_model'
-)
-
-build_and_train(
-    'data/hospital_bed_data_enhanced.csv',
-    'general_available',
-    ['general_available', 'er_visits_rolling_mean_7', 'day_of_week', 'month', 'is_weekend', 'holiday_flag'],
-    'general_model'
-)
-
-# 🧑‍⚕️ Staff Models
-build_and_train(
-    'data/staff_allocation_enhanced.csv',
-    'available_doctors',
-    ['available_doctors', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'],
-    'doctor_model'
-)
-
-build_and_train(
-    'data/staff_allocation_enhanced.csv',
-    'available_nurses',
-    ['available_nurses', 'staff_absenteeism_rate', 'staff_shift_type_A', 'staff_shift_type_B', 'staff_shift_type_C', 'day_of_week', 'month', 'holiday_flag'],
-    'nurse_model'
-)
-
-# 🫁 Ventilator Model
-build_and_train(
-    'data/ventilators_enhanced.csv',
-    'available_ventilators',
-    ['available_ventilators', 'day_of_week', 'month', 'holiday_flag'],
-    'ventilator_model'
-)
+# 📁 train_models.py
+import json
+import argparse
+from src.sites import get_site
+from src.training import build_and_train, train_all  # noqa: F401 (build_and_train kept importable from here)
+
+# Trains every resource model (single-step + direct horizons) of one site. Unchanged
+# models are skipped via the content hashes in <model_dir>/training_manifest.json.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the resource forecasting models")
+    parser.add_argument('site', nargs='?', default=None, help="site name from the sites file (default: data/ + model/)")
+    parser.add_argument('--workers', type=int, default=None, help="parallel training processes (default: one per job, up to CPU count)")
+    parser.add_argument('--force', action='store_true', help="retrain even if inputs are unchanged")
+    parser.add_argument('--horizons', default=None, help="comma-separated direct horizons, overrides HRF_DIRECT_HORIZONS")
+    parser.add_argument('--intra-op', type=int, default=1, help="TensorFlow intra-op threads per worker")
+    parser.add_argument('--inter-op', type=int, default=1, help="TensorFlow inter-op threads per worker")
+    parser.add_argument('--dropout', type=float, default=None, help="dropout rate before the output layer (enables MC-dropout intervals)")
+    parser.add_argument('--streaming', action='store_true', help="stream the CSVs in chunks instead of loading them")
+    args = parser.parse_args()
+
+    horizons = [int(h) for h in args.horizons.split(',') if h.strip()] if args.horizons is not None else None
+    site = get_site(args.site) if args.site else None
+    hyperparams = {'dropout': args.dropout} if args.dropout else None
+    manifest = train_all(site, horizons, workers=args.workers, force=args.force, hyperparams=hyperparams,
+                         intra_op=args.intra_op, inter_op=args.inter_op, streaming=args.streaming)
+    print(json.dumps(manifest, indent=2, sort_keys=True))